@@ -12,6 +12,9 @@ class PowerDeviationMatrixConfiguration(base_configuration.XmlBase):
         self.below_count_by_dimension = None
         self.above_count_by_dimension = None
 
+        self.matrix = None
+        self.grid_indices = None
+
         if path is not None:
 
             self.isNew = False
@@ -166,6 +169,69 @@ class PowerDeviationMatrixConfiguration(base_configuration.XmlBase):
         return round(round((value - dimension.centerOfFirstBin) / dimension.binWidth, 0)
                      * dimension.binWidth + dimension.centerOfFirstBin, 4)
 
+    def getBins(self, dimension, values, grid):
+
+        # getBin for a whole array, together with the index of each bin in the dense matrix
+        # (-1 if not a matrix bin): the half-away-from-zero bin number is found element-wise
+        # and the rounding to 4dp is done once per distinct bin number
+
+        scaled = (values - dimension.centerOfFirstBin) / dimension.binWidth
+
+        magnitudes = np.abs(scaled)
+        whole = np.floor(magnitudes)
+
+        with np.errstate(invalid='ignore'):
+            bin_numbers = np.copysign(whole + (magnitudes - whole >= 0.5), scaled)
+
+        bin_values = np.empty(len(values))
+        bin_values.fill(np.nan)
+
+        bin_indices = np.empty(len(values), dtype=int)
+        bin_indices.fill(-1)
+
+        valid = ~np.isnan(bin_numbers)
+
+        distinct, inverse = np.unique(bin_numbers[valid], return_inverse=True)
+
+        distinct_values = np.array([round(bin_number * dimension.binWidth + dimension.centerOfFirstBin, 4)
+                                    for bin_number in distinct])
+
+        distinct_indices = np.array([grid.get(bin_value, -1) for bin_value in distinct_values], dtype=int)
+
+        if len(distinct) > 0:
+            bin_values[valid] = distinct_values[inverse]
+            bin_indices[valid] = distinct_indices[inverse]
+
+        return bin_values, bin_indices
+
+    def dense_matrix(self):
+
+        # cells as an N-D array (NaN where unpopulated) with, per dimension,
+        # a lookup from bin value to array index
+
+        if self.matrix is None:
+
+            self.grid_indices = []
+
+            for dimension in self.dimensions:
+                centers = [round(float(index) * dimension.binWidth + dimension.centerOfFirstBin, 4)
+                           for index in range(dimension.numberOfBins)]
+                self.grid_indices.append(dict((center, index) for index, center in enumerate(centers)))
+
+            matrix = np.empty([dimension.numberOfBins for dimension in self.dimensions])
+            matrix.fill(np.nan)
+
+            for key in self.cells:
+
+                indices = [grid.get(center) for grid, center in zip(self.grid_indices, key)]
+
+                if not None in indices:
+                    matrix[tuple(indices)] = self.cells[key]
+
+            self.matrix = matrix
+
+        return self.matrix
+
     def reset_out_of_range_count(self):
 
         self.total_count = 0
@@ -253,6 +319,74 @@ class PowerDeviationMatrixConfiguration(base_configuration.XmlBase):
         
         return self.cells[key]
 
+    def get_deviations(self, powers, parameters):
+
+        # get_deviation for whole arrays of powers and parameter values,
+        # updating the counters in the same way
+
+        if len(self.dimensions) < 1:
+            raise Exception("Matrix has zero dimensions")
+
+        if not hasattr(self, 'total_count'):
+            self.reset_out_of_range_count()
+
+        powers = np.asarray(powers, dtype=float)
+
+        matrix = self.dense_matrix()
+
+        self.total_count += len(powers)
+
+        with np.errstate(invalid='ignore'):
+            active = ~(powers <= 0.0)
+
+        out_of_range = np.zeros(len(powers), dtype=bool)
+        grid_indices = []
+
+        for dimension, grid in zip(self.dimensions, self.grid_indices):
+
+            values = np.asarray(parameters[dimension.parameter], dtype=float)
+
+            bin_values, bin_indices = self.getBins(dimension, values, grid)
+
+            dimension_out_of_range = active & ~dimension.withinRanges(bin_values)
+
+            with np.errstate(invalid='ignore'):
+                below = dimension_out_of_range & (values < dimension.centerOfFirstBin)
+                above = dimension_out_of_range & (values > dimension.centerOfLastBin)
+
+            self.out_of_range_count_by_dimension[dimension.parameter] += np.count_nonzero(dimension_out_of_range)
+            self.below_count_by_dimension[dimension.parameter] += np.count_nonzero(below)
+            self.above_count_by_dimension[dimension.parameter] += np.count_nonzero(above)
+
+            out_of_range |= dimension_out_of_range
+
+            grid_indices.append(bin_indices)
+
+        in_range = active & ~out_of_range
+
+        on_grid = in_range.copy()
+
+        for indices in grid_indices:
+            on_grid &= (indices >= 0)
+
+        deviations = np.zeros(len(powers))
+        deviations[active] = self.outOfRangeValue
+
+        cell_values = matrix[tuple(indices[on_grid] for indices in grid_indices)]
+        populated = ~np.isnan(cell_values)
+
+        found = np.flatnonzero(on_grid)[populated]
+        deviations[found] = cell_values[populated]
+
+        out_of_range_count = np.count_nonzero(active & out_of_range)
+        unpopulated_count = np.count_nonzero(in_range) - len(found)
+
+        self.out_of_range_count += out_of_range_count
+        self.in_range_unpopulated += unpopulated_count
+        self.value_not_found += out_of_range_count + unpopulated_count
+
+        return deviations
+
 
 class PowerDeviationMatrixDimension(object):
 
@@ -306,6 +440,25 @@ class PowerDeviationMatrixDimension(object):
             
     def withinRange(self, value):
 
+        self.check_limits()
+
+        if value < self.centerOfFirstBin:
+            return False
+
+        if value > self.centerOfLastBin:
+            return False
+
+        return True
+
+    def withinRanges(self, values):
+
+        self.check_limits()
+
+        with np.errstate(invalid='ignore'):
+            return ~((values < self.centerOfFirstBin) | (values > self.centerOfLastBin))
+
+    def check_limits(self):
+
         if self.centerOfFirstBin is None \
            or self.centerOfLastBin is None:
 
@@ -324,11 +477,3 @@ class PowerDeviationMatrixDimension(object):
                 error += '- PDM number of bins not defined\n'
 
             raise Exception(error)
-
-        if value < self.centerOfFirstBin:
-            return False
-
-        if value > self.centerOfLastBin:
-            return False
-
-        return True
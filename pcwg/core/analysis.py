@@ -89,13 +89,14 @@ class SubPower:
     
     def calculate_sub_power(self, data_frame):
 
-        data_frame.loc[:, self.wind_speed_sub_bin_col] = data_frame[self.wind_speed_column] \
-                                                            .map(self.wind_speed_sub_bins.binCenter)
+        # kept out of the data frame, which may be shared between inner range trials
+        sub_bins = self.wind_speed_sub_bins.binCenters(data_frame[self.wind_speed_column])
+        sub_bins.name = self.wind_speed_sub_bin_col
 
         Status.add("Creating sub-power distribution", verbosity=2)
 
-        sub_distribution = data_frame[self.power_column].groupby(data_frame[self.wind_speed_sub_bin_col]).agg({self.data_count:'count'})
-        sub_power = data_frame[[self.power_column]].groupby(data_frame[self.wind_speed_sub_bin_col]).agg({self.power_column:'mean'})
+        sub_distribution = data_frame[self.power_column].groupby(sub_bins).agg({self.data_count:'count'})
+        sub_power = data_frame[[self.power_column]].groupby(sub_bins).agg({self.power_column:'mean'})
                 
         sub_power = sub_power.join(sub_distribution, how = 'inner')
         sub_power.dropna(inplace = True)                           
@@ -184,6 +185,13 @@ class Analysis(object):
 
     def calculate_analysis(self):
 
+        self.prepare_data()
+        self.calculate_results()
+
+    def prepare_data(self):
+
+        # stages which do not depend on the power curve
+
         self.load_specified_power_curve()
 
         self.calculate_meteorlogical_data_stats()
@@ -195,6 +203,8 @@ class Analysis(object):
         self.apply_negative_power_period_treatment()           
         self.calculate_dataset_hours()
 
+    def calculate_results(self):
+
         self.calculate_actual_power_curves()         
 
         self.powerCurve = self.selectPowerCurve(self.powerCurveMode)
@@ -246,7 +256,7 @@ class Analysis(object):
     def define_wind_speed_bins(self):
 
         self.windSpeedBins = binning.Bins(self.powerCurveFirstBin, self.powerCurveBinSize, self.powerCurveLastBin)
-        self.dataFrame.loc[:, self.windSpeedBin] = self.dataFrame.loc[:, self.baseline.wind_speed_column].map(self.windSpeedBins.binCenter)        
+        self.dataFrame.loc[:, self.windSpeedBin] = self.windSpeedBins.binCenters(self.dataFrame.loc[:, self.baseline.wind_speed_column])
 
     def apply_negative_power_period_treatment(self):
 
@@ -379,14 +389,16 @@ class Analysis(object):
             self.innerMeasuredPowerCurve = None
             self.outerMeasuredPowerCurve = None
 
-    def calculate_inner_measured_power_curve(self, supress_zero_turbulence_curve_creation=False, override_interpolation_method=None):
+    def calculate_inner_measured_power_curve(self, supress_zero_turbulence_curve_creation=False, override_interpolation_method=None, inner_range_dimensions=None):
             
             if supress_zero_turbulence_curve_creation:
                 zero_ti_pc_required = False
             else:
                 zero_ti_pc_required = (self.powerCurveMode == 'InnerMeasured')
 
-            return self.calculateMeasuredPowerCurve(self.get_inner_range_filter, self.cutInWindSpeed, self.cutOutWindSpeed, self.ratedPower, self.actualPower, 'Inner Range', zero_ti_pc_required = zero_ti_pc_required, override_interpolation_method=override_interpolation_method)
+            filter_func = lambda: self.get_inner_range_filter(inner_range_dimensions)
+
+            return self.calculateMeasuredPowerCurve(filter_func, self.cutInWindSpeed, self.cutOutWindSpeed, self.ratedPower, self.actualPower, 'Inner Range', zero_ti_pc_required = zero_ti_pc_required, override_interpolation_method=override_interpolation_method)
 
     def calculate_outer_measured_power_curve(self):
             return self.calculateMeasuredPowerCurve(self.get_outer_range_filter, self.cutInWindSpeed, self.cutOutWindSpeed, self.ratedPower, self.actualPower, 'Outer Range', zero_ti_pc_required = (self.powerCurveMode == 'OuterMeasured'))
@@ -744,11 +756,14 @@ class Analysis(object):
     def get_inner_dimension_filter(self, dimension):
         return (self.dataFrame[dimension.parameter] >= dimension.lower_limit) & (self.dataFrame[dimension.parameter] <= dimension.upper_limit)
 
-    def get_inner_range_filter(self):
+    def get_inner_range_filter(self, inner_range_dimensions=None):
+
+        if inner_range_dimensions is None:
+            inner_range_dimensions = self.inner_range_dimensions
 
         mask = self.get_base_filter()
 
-        for dimension in self.inner_range_dimensions:
+        for dimension in inner_range_dimensions:
             mask = mask & self.get_inner_dimension_filter(dimension)
 
         return mask
@@ -776,7 +791,7 @@ class Analysis(object):
         return mask
 
     def interpolatePowerCurve(self, powerCurveLevels, ws_col, interp_power_col):
-        self.dataFrame[interp_power_col] = self.dataFrame[ws_col].apply(powerCurveLevels.power)
+        self.dataFrame[interp_power_col] = powerCurveLevels.power_array(self.dataFrame[ws_col])
 
     def calculateMeasuredPowerCurve(self, filter_func, cutInWindSpeed, cutOutWindSpeed, ratedPower, powerColumn, name, zero_ti_pc_required = False, override_interpolation_method=None):
 
@@ -885,7 +900,7 @@ class Analysis(object):
         
         try:
             
-            energyDiffMWh = np.abs((self.dataFrame.loc[rows, powerColumn] - self.dataFrame.loc[rows, self.baseline.wind_speed_column].apply(measuredPowerCurve.power)) * (float(self.timeStepInSeconds) / 3600.))
+            energyDiffMWh = np.abs((self.dataFrame.loc[rows, powerColumn] - measuredPowerCurve.power_array(self.dataFrame.loc[rows, self.baseline.wind_speed_column])) * (float(self.timeStepInSeconds) / 3600.))
             energyMWh = self.dataFrame.loc[rows, powerColumn] * (float(self.timeStepInSeconds) / 3600.)
             powerCurveScatterMetric = energyDiffMWh.sum() / energyMWh.sum()
 
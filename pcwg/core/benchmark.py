@@ -61,7 +61,7 @@ class BenchmarkAnalysis(Analysis):
             
                 raise Exception(exc_str)
             
-            self.dataFrame[self.basePower] = self.dataFrame.apply(PowerCalculator(self.powerCurve, self.baseline.wind_speed_column).power, axis=1)
+            self.dataFrame[self.basePower] = PowerCalculator(self.powerCurve, self.baseline.wind_speed_column).powers(self.dataFrame)
 
         elif self.baseLineMode == "Measured":
             
@@ -78,7 +78,7 @@ class BenchmarkAnalysis(Analysis):
 
     def calculateHubBenchmark(self):
         self.hubPower = "Hub Power"
-        self.dataFrame[self.hubPower] = self.dataFrame.apply(PowerCalculator(self.powerCurve, self.baseline.wind_speed_column).power, axis=1)
+        self.dataFrame[self.hubPower] = PowerCalculator(self.powerCurve, self.baseline.wind_speed_column).powers(self.dataFrame)
         self.hubYield = self.dataFrame[self.get_base_filter()][self.baseline.power_column].sum() * self.timeStampHours
         self.hubYieldCount = self.dataFrame[self.get_base_filter()][self.hubPower].count()
         self.hubDelta = self.hubYield / self.baseYield - 1.0
@@ -1,4 +1,5 @@
 import numpy as np
+import pandas as pd
 
 class Bins:
 
@@ -92,6 +93,39 @@ class Bins:
 
         return self.binCenterByIndex(index)
 
+    def binCenters(self, values):
+
+        x = np.asarray(values, dtype=float)
+
+        with np.errstate(invalid='ignore'):
+
+            # round half away from zero, as the builtin round() does
+            scaled = (x - self.centerOfFirstBin) / self.binWidth
+            magnitude = np.abs(scaled)
+            rounded = np.floor(magnitude)
+            rounded += (magnitude - rounded) >= 0.5
+            index = np.copysign(rounded, scaled)
+
+            end = self.binCenterByIndex(index) + self.binWidth / 2.0
+
+            #nudge values at bin end into next bin
+            nudge = (np.abs(x - end) < Bins.TOLERANCE) & (index < (self.numberOfBins - 1))
+
+        centers = self.binCenterByIndex(index + nudge)
+
+        #values exactly at a bin start take that bin's center
+        starts = np.array(sorted(self.starts), dtype=float)
+
+        if len(starts) > 0:
+            positions = np.minimum(np.searchsorted(starts, x), len(starts) - 1)
+            at_start = (starts[positions] == x)
+            centers[at_start] = np.array([self.starts[start] for start in starts])[positions[at_start]]
+
+        if isinstance(values, pd.Series):
+            return pd.Series(centers, index=values.index)
+        else:
+            return centers
+
 
 class DirectionBins(Bins):
 
@@ -109,6 +143,12 @@ class DirectionBins(Bins):
 
         return center
 
+    def binCenters(self, values):
+
+        centers = Bins.binCenters(self, values)
+
+        return (centers + 360.0) % 360
+
 class Aggregations:
 
     def __init__(self, minimumCount = 0):
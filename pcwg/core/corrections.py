@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from ..core.status import Status
 
@@ -10,6 +11,9 @@ class PowerCalculator:
     def power(self, row):
         return self.powerCurve.power(row[self.windSpeedColumn])
 
+    def powers(self, data_frame):
+        return self.powerCurve.power_array(data_frame[self.windSpeedColumn])
+
 
 class DensityCorrectionCalculator:
     def __init__(self, referenceDensity, windSpeedColumn, densityColumn):
@@ -20,6 +24,9 @@ class DensityCorrectionCalculator:
     def densityCorrectedHubWindSpeed(self, row):
         return row[self.windSpeedColumn] * (row[self.densityColumn] / self.referenceDensity) ** (1.0 / 3.0)
 
+    def densityCorrectedHubWindSpeeds(self, data_frame):
+        return data_frame[self.windSpeedColumn] * (data_frame[self.densityColumn] / self.referenceDensity) ** (1.0 / 3.0)
+
 
 class TurbulencePowerCalculator:
     def __init__(self, powerCurve, ratedPower, windSpeedColumn, turbulenceColumn, augment_turbulence_correction=False, normalised_wind_speed_column=None):
@@ -33,6 +40,18 @@ class TurbulencePowerCalculator:
     def power(self, row):
         return self.powerCurve.power(row[self.windSpeedColumn], row[self.turbulenceColumn],self.augment_turbulence_correction, row[self.normalised_wind_speed_column])
 
+    def powers(self, data_frame):
+
+        if self.augment_turbulence_correction:
+            normalised_wind_speeds = data_frame[self.normalised_wind_speed_column]
+        else:
+            normalised_wind_speeds = None
+
+        return self.powerCurve.power_array(data_frame[self.windSpeedColumn],
+                                           data_frame[self.turbulenceColumn],
+                                           self.augment_turbulence_correction,
+                                           normalised_wind_speeds)
+
 
 class PowerDeviationMatrixPowerCalculator:
     def __init__(self, powerCurve, powerDeviationMatrix, windSpeedColumn, parameterColumns):
@@ -47,6 +66,20 @@ class PowerDeviationMatrixPowerCalculator:
         deviation = self.get_deviation(base_power, row)
         return base_power * (1.0 + deviation)
 
+    def powers(self, data_frame):
+
+        base_powers = self.powerCurve.power_array(data_frame[self.windSpeedColumn])
+
+        parameters = {}
+
+        for dimension in self.powerDeviationMatrix.dimensions:
+            column = self.parameterColumns[dimension.parameter]
+            parameters[dimension.parameter] = data_frame[column].values
+
+        deviations = self.powerDeviationMatrix.get_deviations(base_powers, parameters)
+
+        return base_powers * (1.0 + deviations)
+
     def get_deviation(self, base_power, row):
 
         parameters = {}
@@ -76,8 +109,7 @@ class Source(object):
 
         if power_curve is not None:
             self.power_column = "{0} Power".format(self.wind_speed_column)
-            data_frame.loc[:, self.power_column] = data_frame.apply(
-                PowerCalculator(power_curve, self.wind_speed_column).power, axis=1)
+            data_frame.loc[:, self.power_column] = PowerCalculator(power_curve, self.wind_speed_column).powers(data_frame)
         else:
             self.power_column = None
 
@@ -198,12 +230,19 @@ class WindSpeedBasedCorrection(Correction):
 
         self.wind_speed_column = "{0} Wind Speed".format(self.correction_name)
 
+    def wind_speeds(self, data_frame):
+        # subclasses return the corrected wind speeds for the whole data frame
+        # as a column (not via a row callback)
+        raise Exception("Not implemented")
+
+    def calculate_wind_speed(self, data_frame):
+        data_frame[self.wind_speed_column] = self.wind_speeds(data_frame)
+
     def finalise(self, data_frame, power_curve):
 
         if power_curve is not None:
             self.power_column = "{0} Power".format(self.correction_name)
-            data_frame[self.power_column] = data_frame.apply(PowerCalculator(power_curve, self.wind_speed_column).power,
-                                                             axis=1)
+            data_frame[self.power_column] = PowerCalculator(power_curve, self.wind_speed_column).powers(data_frame)
         else:
             self.power_column = None
 
@@ -222,7 +261,7 @@ class PowerBasedCorrection(Correction):
         self.power_curve = power_curve
 
     def finalise(self, data_frame, calculator):
-        data_frame[self.power_column] = data_frame.apply(calculator.power, axis=1)
+        data_frame[self.power_column] = calculator.powers(data_frame)
 
         Status.add("{0} Correction Complete.".format(self.correction_name))
 
@@ -235,12 +274,15 @@ class DensityEquivalentWindSpeed(WindSpeedBasedCorrection):
 
         Status.add("Correcting to reference density of {0:.4f} kg/m^3".format(reference_density))
 
-        calculator = DensityCorrectionCalculator(reference_density, source.wind_speed_column, hub_density_column)
+        self.calculator = DensityCorrectionCalculator(reference_density, source.wind_speed_column, hub_density_column)
 
-        data_frame[self.wind_speed_column] = data_frame.apply(calculator.densityCorrectedHubWindSpeed, axis=1)
+        self.calculate_wind_speed(data_frame)
 
         self.finalise(data_frame, power_curve)
 
+    def wind_speeds(self, data_frame):
+        return self.calculator.densityCorrectedHubWindSpeeds(data_frame)
+
 
 class RotorEquivalentWindSpeed(WindSpeedBasedCorrection):
     def __init__(self,
@@ -286,8 +328,7 @@ class RotorEquivalentWindSpeed(WindSpeedBasedCorrection):
             rews_to_hub_ratios.append(original_dataset.calculate_rews(rewsVeer, rewsUpflow, rewsExponent))
 
         data_frame[self.rews_to_hub_ratio_column] = pd.concat(rews_to_hub_ratios, axis=1, join='inner')
-        data_frame[self.wind_speed_column] = data_frame[source.wind_speed_column] * data_frame[
-            self.rews_to_hub_ratio_column]
+        self.calculate_wind_speed(data_frame)
 
         Status.add("Calculating REWS Deviation Matrix...")
 
@@ -298,6 +339,9 @@ class RotorEquivalentWindSpeed(WindSpeedBasedCorrection):
 
         self.finalise(data_frame, power_curve)
 
+    def wind_speeds(self, data_frame):
+        return data_frame[self.source.wind_speed_column] * data_frame[self.rews_to_hub_ratio_column]
+
 
 class TurbulenceCorrection(PowerBasedCorrection):
 
@@ -9,6 +9,8 @@ import turbine
 import warnings
 
 from power_deviation_matrix import ResidualWindSpeedMatrix
+from dataset_cache import DatasetCache
+from timestamps import parse_timestamps
 
 from ..core.status import Status
 
@@ -179,6 +181,25 @@ class SiteCalibrationCalculator:
     def calibrate(self, directionBin, value):
         return self.calibrationSectorDataframe['Offset'][directionBin] + self.calibrationSectorDataframe['Slope'][directionBin] * value
 
+    def calibrate_dataframe(self, dataFrame):
+        return self.calibrate_series(dataFrame[self.directionBinColumn], dataFrame[self.valueColumn])
+
+    def calibrate_series(self, direction_bins, values):
+
+        sectors = pd.Index(self.calibrationSectorDataframe.index.values.astype(float))
+        positions = sectors.get_indexer(np.asarray(direction_bins, dtype=float))
+
+        # inactive, unknown and missing sectors (position -1) pick up the trailing NaN
+        offsets = np.append(self.calibrationSectorDataframe['Offset'].values.astype(float), np.nan)
+        slopes = np.append(self.calibrationSectorDataframe['Slope'].values.astype(float), np.nan)
+
+        calibrated = offsets.take(positions) + slopes.take(positions) * np.asarray(values, dtype=float)
+
+        if isinstance(values, pd.Series):
+            return pd.Series(calibrated, index=values.index)
+        else:
+            return calibrated
+
     def IECLimitCalculator(self):
         if len(self.calibrationSectorDataframe.index) == 36 and 'vRatio' in self.calibrationSectorDataframe.columns:
             self.calibrationSectorDataframe['pctSpeedUp'] = (self.calibrationSectorDataframe['SpeedUpAt10']-1)*100
@@ -252,6 +273,40 @@ class ShearExponentCalculator:
 
             return polyfit_slope
 
+    def shearExponents(self, dataFrame):
+
+        if len(self.shearMeasurements) < 1:
+            raise Exception("No shear heights have been defined")
+        elif len(self.shearMeasurements) == 1:
+            raise Exception("Only one shear height has been defined (two need to be defined as a minimum)")
+
+        # least squares slope of log(wind speed) against log(height) for every row at once
+        log_heights = np.log(np.array([item.height for item in self.shearMeasurements], dtype=float))
+
+        windspeeds = dataFrame[[item.wind_speed_column for item in self.shearMeasurements]].values.astype(float)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+
+            log_windspeeds = np.log(windspeeds)
+
+            valid = ~np.isnan(log_windspeeds)
+            count = valid.sum(axis=1)
+
+            mean_log_heights = np.where(valid, log_heights, 0.0).sum(axis=1) / count
+            mean_log_windspeeds = np.where(valid, log_windspeeds, 0.0).sum(axis=1) / count
+
+            x = np.where(valid, log_heights - mean_log_heights[:, np.newaxis], 0.0)
+            y = np.where(valid, log_windspeeds - mean_log_windspeeds[:, np.newaxis], 0.0)
+
+            slopes = (x * y).sum(axis=1) / (x * x).sum(axis=1)
+
+        slopes[count < 2] = np.nan
+
+        # zero wind speeds give -inf, for which polyfit returns NaN
+        slopes[np.isinf(log_windspeeds).any(axis=1)] = np.nan
+
+        return pd.Series(slopes, index=dataFrame.index)
+
 class Dataset:
 
     def __init__(self, config):
@@ -335,10 +390,25 @@ class Dataset:
 
     def load_raw_data(self, config):
 
-        dateConverter = lambda x: datetime.datetime.strptime(x, config.dateFormat)
-        dataFrame = pd.read_csv(config.input_time_series.absolute_path, index_col=config.timeStamp, \
-                                parse_dates = True, date_parser = dateConverter, sep = getSeparatorValue(config.separator), \
-                                skiprows = config.headerRows, decimal = getDecimalValue(config.decimal)).replace(config.badData, np.nan)
+        path = config.input_time_series.absolute_path
+
+        if DatasetCache.Enabled:
+            cache_key = DatasetCache.key(path, self.raw_data_parse_settings(config))
+            dataFrame = DatasetCache.load(cache_key)
+        else:
+            cache_key = None
+            dataFrame = None
+
+        if dataFrame is None:
+
+            dataFrame = self.parse_raw_data(config)
+
+            if cache_key is not None:
+                DatasetCache.store(cache_key, dataFrame)
+
+        else:
+
+            Status.add('raw data loaded from cache', verbosity=2)
 
         if config.startDate != None and config.endDate != None:
             dataFrame = dataFrame[config.startDate : config.endDate]
@@ -355,6 +425,80 @@ class Dataset:
 
         return dataFrame
 
+    def raw_data_parse_settings(self, config):
+        return (config.timeStamp, config.separator, config.decimal, config.headerRows, config.dateFormat, config.badData,
+                tuple(self.raw_data_columns(config)))
+
+    def raw_data_columns(self, config):
+
+        # every time series column the configuration can refer to (other columns are not loaded)
+
+        columns = [config.timeStamp,
+                   config.hubWindSpeed,
+                   config.hubTurbulence,
+                   config.referenceWindSpeed,
+                   config.referenceWindSpeedStdDev,
+                   config.referenceWindDirection,
+                   config.turbineLocationWindSpeed,
+                   config.inflowAngle,
+                   config.power,
+                   config.powerMin,
+                   config.powerMax,
+                   config.powerSD,
+                   config.pressure,
+                   config.temperature,
+                   config.density,
+                   config.density_pre_correction_wind_speed]
+
+        for measurement in config.referenceShearMeasurements + config.turbineShearMeasurements:
+            columns.append(measurement.wind_speed_column)
+
+        for item in config.rewsProfileLevels:
+            columns += [item.wind_speed_column, item.wind_direction_column, item.upflow_column]
+
+        for componentFilter in config.filters + config.calibrationFilters:
+            columns += self.filter_columns(componentFilter)
+
+        columns += config.sensitivityDataColumns
+
+        return sorted(set(column for column in columns if self.valid_column(column)))
+
+    def filter_columns(self, componentFilter):
+
+        if hasattr(componentFilter, "startTime"):
+            return []
+
+        if hasattr(componentFilter, "clauses"):
+            columns = []
+            for clause in componentFilter.clauses:
+                columns += self.filter_columns(clause)
+            return columns
+
+        if componentFilter.derived:
+            return [componentFilter.column] + [factor[0] for factor in componentFilter.value]
+
+        return [componentFilter.column]
+
+    def parse_raw_data(self, config):
+
+        path = config.input_time_series.absolute_path
+        separator = getSeparatorValue(config.separator)
+
+        header = pd.read_csv(path, sep = separator, skiprows = config.headerRows, nrows = 0).columns
+
+        required = set(self.raw_data_columns(config))
+        usecols = [column for column in header if column in required]
+
+        # time stamps are read as text and converted as a whole column afterwards
+        dataFrame = pd.read_csv(path, dtype = {config.timeStamp: str}, usecols = usecols, \
+                                sep = separator, skiprows = config.headerRows, \
+                                decimal = getDecimalValue(config.decimal))
+
+        timeStamps = dataFrame.pop(config.timeStamp)
+        dataFrame.index = parse_timestamps(timeStamps.values, config.dateFormat, name=timeStamps.name)
+
+        return dataFrame.replace(config.badData, np.nan)
+
     def finalise_data(self, config, dataFrame):
 
         self.fullDataFrame = dataFrame.copy()
@@ -454,16 +598,16 @@ class Dataset:
 
         if not self.shearCalibration:
             Status.add('Calibrating shear')
-            dataFrame[self.shearExponent] = dataFrame.apply(ShearExponentCalculator(config.referenceShearMeasurements).shearExponent, axis=1)
+            dataFrame[self.shearExponent] = ShearExponentCalculator(config.referenceShearMeasurements).shearExponents(dataFrame)
         else:
 
             Status.add('Calculating shear')
 
-            dataFrame[self.turbineShearExponent] = dataFrame.apply(ShearExponentCalculator(config.turbineShearMeasurements).shearExponent, axis=1)
-            dataFrame[self.referenceShearExponent] = dataFrame.apply(ShearExponentCalculator(config.referenceShearMeasurements).shearExponent, axis=1)
+            dataFrame[self.turbineShearExponent] = ShearExponentCalculator(config.turbineShearMeasurements).shearExponents(dataFrame)
+            dataFrame[self.referenceShearExponent] = ShearExponentCalculator(config.referenceShearMeasurements).shearExponents(dataFrame)
 
             self.shearCalibrationCalculator = self.createShearCalibration(dataFrame ,config, config.timeStepInSeconds)
-            dataFrame[self.shearExponent] = dataFrame.apply(self.shearCalibrationCalculator.turbineValue, axis=1)
+            dataFrame[self.shearExponent] = self.shearCalibrationCalculator.calibrate_dataframe(dataFrame)
         
         dataFrame[self.shearExponentAlias] = dataFrame[self.shearExponent]
 
@@ -549,7 +693,7 @@ class Dataset:
 
         Status.add('Applying calibration')
         self.calibrationCalculator = self.createCalibration(dataFrame, config, config.timeStepInSeconds)
-        dataFrame[self.hubWindSpeed] = dataFrame.apply(self.calibrationCalculator.turbineValue, axis=1)
+        dataFrame[self.hubWindSpeed] = self.calibrationCalculator.calibrate_dataframe(dataFrame)
 
         if dataFrame[self.hubWindSpeed].count() < 1:
             raise Exception("Hub wind speed column is empty after application of calibration")
@@ -669,19 +813,23 @@ class Dataset:
             
     def _v_ratio_convergence_check(self):
         df = self.filteredCalibrationDataframe[[self.referenceWindSpeed,self.turbineLocationWindSpeed,self.referenceDirectionBin]]
-        conv_check = pd.DataFrame()
-        dirs = df[self.referenceDirectionBin].dropna().unique()
-        dirs.sort()
-        for dir_bin in dirs:
-            Status.add("Checking convergence of %s deg sector" % dir_bin, verbosity=2)
-            sect_df = df[df[self.referenceDirectionBin] == dir_bin].reset_index().loc[:, [self.referenceWindSpeed, self.turbineLocationWindSpeed]]
-            sect_df['vRatio'] = sect_df[self.turbineLocationWindSpeed] / sect_df[self.referenceWindSpeed]
-            sect_df = sect_df[~np.isnan(sect_df['vRatio'])].reset_index()
-            sect_df['rolling_mean_vRatio'] = np.nan
-            for i in range(len(sect_df)):
-                sect_df.loc[i, 'rolling_mean_vRatio'] = sect_df.loc[sect_df.index < i+1, 'vRatio'].mean()
-            sect_df['rolling_mean_vRatio'] /= sect_df.loc[sect_df.index[-1], 'rolling_mean_vRatio']
-            conv_check = pd.concat([conv_check, pd.DataFrame(sect_df['rolling_mean_vRatio']).rename(columns = {'rolling_mean_vRatio':int(dir_bin)})], axis = 1)
+        Status.add("Checking convergence of calibration sectors", verbosity=2)
+        vRatio = df[self.turbineLocationWindSpeed] / df[self.referenceWindSpeed]
+        valid = ~np.isnan(vRatio) & df[self.referenceDirectionBin].notnull()
+        vRatio = vRatio[valid]
+        sectors = df.loc[valid, self.referenceDirectionBin]
+        if len(vRatio) > 0:
+            # cumulative mean of each sector in its own time order, relative to the sector's overall mean
+            sector_groups = vRatio.groupby(sectors.values)
+            position = sector_groups.cumcount()
+            rolling_mean_vRatio = sector_groups.cumsum() / (position + 1)
+            rolling_mean_vRatio /= rolling_mean_vRatio.groupby(sectors.values).transform('last')
+            conv_check = pd.DataFrame({'position': position.values, 'sector': sectors.values, 'rolling_mean_vRatio': rolling_mean_vRatio.values})
+            conv_check = conv_check.pivot(index = 'position', columns = 'sector', values = 'rolling_mean_vRatio')
+            conv_check.columns = [int(sector) for sector in conv_check.columns]
+            conv_check.index.name = None
+        else:
+            conv_check = pd.DataFrame()
         conv_check.index += 1
         self.calibrationSectorConverge = conv_check
         if len(self.calibrationSectorConverge) >= 144:
@@ -1068,7 +1216,7 @@ class Dataset:
 
         rotorEquivalentWindSpeed = rews.RotorEquivalentWindSpeed(self.profileLevels, self.rotor, self.profileHubWindSpeedCalculator, rewsVeer, rewsUpflow, rewsExponent)
 
-        self.dataFrame[self.rewsToHubRatio] = self.dataFrame.apply(rotorEquivalentWindSpeed.rewsToHubRatio, axis=1)
+        self.dataFrame[self.rewsToHubRatio] = rotorEquivalentWindSpeed.rewsToHubRatios(self.dataFrame)
 
         return self.dataFrame[self.rewsToHubRatio]
 
@@ -1078,6 +1226,6 @@ class Dataset:
 
         rotorEquivalentWindSpeed = rews.ProductionByHeight(profileLevels, self.rotor, profileHubWindSpeedCalculator, power_curve)
 
-        self.dataFrame[self.productionByHeight] = self.dataFrame.apply(rotorEquivalentWindSpeed.calculate, axis=1)
+        self.dataFrame[self.productionByHeight] = rotorEquivalentWindSpeed.calculate_array(self.dataFrame)
 
         return self.dataFrame[self.productionByHeight]
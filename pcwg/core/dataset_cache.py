@@ -0,0 +1,175 @@
+import os
+import os.path
+import string
+import hashlib
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from ..core.status import Status
+
+import version as ver
+
+
+def replace_file(source, destination):
+
+    # atomic on both platforms; os.rename will not replace an existing file on Windows
+
+    if os.name == 'nt':
+
+        import ctypes
+
+        MOVEFILE_REPLACE_EXISTING = 0x1
+
+        if not ctypes.windll.kernel32.MoveFileExW(unicode(source), unicode(destination), MOVEFILE_REPLACE_EXISTING):
+            raise ctypes.WinError()
+
+    else:
+
+        os.rename(source, destination)
+
+
+class FileDigests(object):
+
+    # SHA-1 of a file computed in chunks and remembered for as long as the file
+    # is unchanged; the share analysis ignores whitespace when identifying datasets
+
+    ChunkSize = 1024 ** 2
+    Digests = {}
+
+    @classmethod
+    def digest(cls, path, chunk_size=None, ignore_whitespace=False):
+
+        if chunk_size is None:
+            chunk_size = cls.ChunkSize
+
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime, ignore_whitespace)
+
+        if key not in cls.Digests:
+
+            sha1 = hashlib.sha1()
+
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(chunk_size), ''):
+                    if ignore_whitespace:
+                        chunk = chunk.translate(None, string.whitespace)
+                    sha1.update(chunk)
+
+            cls.Digests[key] = sha1.hexdigest()
+
+        return cls.Digests[key]
+
+
+class DatasetCache(object):
+
+    # On-disk columnar (NPZ) cache of parsed time series. Entries are keyed on the
+    # content of the time series file plus the settings used to parse it, and the
+    # least recently used entries are evicted once the folder exceeds MaximumSize.
+    # The cache is off unless Enabled is set, as it can grow to MaximumSize (2 GB).
+
+    Enabled = False
+    Folder = os.path.join(tempfile.gettempdir(), 'pcwg_dataset_cache')
+    MaximumSize = 2 * 1024 ** 3
+    Extension = '.npz'
+
+    @classmethod
+    def key(cls, path, parse_settings):
+
+        # whitespace matters to the parser, so the exact file content is hashed
+        return hashlib.sha1(repr((FileDigests.digest(path),
+                                  tuple(parse_settings),
+                                  ver.version))).hexdigest()
+
+    @classmethod
+    def entry_path(cls, key):
+        return os.path.join(cls.Folder, key + cls.Extension)
+
+    @classmethod
+    def load(cls, key):
+
+        path = cls.entry_path(key)
+
+        if not os.path.isfile(path):
+            return None
+
+        try:
+
+            with np.load(path, allow_pickle=True) as entry:
+
+                columns = list(entry['columns'])
+                index = pd.Index(entry['index'], name=entry['index_name'][0])
+
+                data = {}
+
+                for i in range(len(columns)):
+                    data[columns[i]] = entry['column_{0}'.format(i)]
+
+            # refresh the access time used for eviction
+            os.utime(path, None)
+
+        except Exception as e:
+            Status.add("Cannot read dataset cache entry {0}: {1}".format(path, e), verbosity=2)
+            return None
+
+        return pd.DataFrame(data, index=index, columns=columns)
+
+    @classmethod
+    def store(cls, key, data_frame):
+
+        path = cls.entry_path(key)
+        temporary_path = path + '.tmp'
+
+        arrays = {'columns': np.array(list(data_frame.columns), dtype=object),
+                  'index': data_frame.index.values,
+                  'index_name': np.array([data_frame.index.name], dtype=object)}
+
+        for i in range(len(data_frame.columns)):
+            arrays['column_{0}'.format(i)] = data_frame.iloc[:, i].values
+
+        try:
+
+            if not os.path.isdir(cls.Folder):
+                os.makedirs(cls.Folder)
+
+            with open(temporary_path, 'wb') as f:
+                np.savez(f, **arrays)
+
+            replace_file(temporary_path, path)
+
+        except Exception as e:
+
+            Status.add("Cannot write dataset cache entry {0}: {1}".format(path, e), verbosity=2)
+
+            if os.path.isfile(temporary_path):
+                os.remove(temporary_path)
+
+            return
+
+        cls.evict()
+
+    @classmethod
+    def evict(cls):
+
+        entries = []
+
+        for file_name in os.listdir(cls.Folder):
+            if file_name.endswith(cls.Extension):
+                path = os.path.join(cls.Folder, file_name)
+                entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+
+        entries.sort()
+
+        total_size = sum(size for (modified, size, path) in entries)
+
+        # the most recent entry is always kept
+        while len(entries) > 1 and total_size > cls.MaximumSize:
+
+            modified, size, path = entries.pop(0)
+
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError as e:
+                Status.add("Cannot evict dataset cache entry {0}: {1}".format(path, e), verbosity=2)
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 
 class AugmentedTurbulenceCorrection(object):
@@ -40,3 +41,24 @@ class AugmentedTurbulenceCorrection(object):
         else:
 
             return 0.0
+
+    def calculate_array(self, normalised_wind_speeds, turbulence_intensities, reference_turbulences):
+
+        delta_turbulence = np.asarray(turbulence_intensities, dtype=float) - reference_turbulences
+        delta_wind_speed = np.asarray(normalised_wind_speeds, dtype=float) \
+                           - AugmentedTurbulenceCorrection.BALANCE_WIND_SPEED
+
+        low = AugmentedTurbulenceCorrection.LAG + np.tanh(delta_turbulence * AugmentedTurbulenceCorrection.LOW_TI)
+        high = np.tanh(delta_turbulence * AugmentedTurbulenceCorrection.HIGH_TI)
+
+        # where() rather than minimum()/maximum() so NaNs collapse to zero as in calculate()
+        predictor = np.where(low < 0.0, low, 0.0) + np.where(high > 0.0, high, 0.0)
+
+        slope = AugmentedTurbulenceCorrection.CONSTANT * predictor
+
+        deviation = delta_wind_speed * slope
+
+        if AugmentedTurbulenceCorrection.APPLY_ABOVE_AND_BELOW:
+            return deviation
+        else:
+            return np.where(delta_wind_speed < 0.0, deviation, 0.0)
@@ -32,9 +32,12 @@ class BaseInterpolator(object):
 class MarmanderPowerCurveInterpolatorBase(BaseInterpolator):
 
     PostCutOutStep = 0.01
+    IntegrationStep = 0.01
     ConvergenceConstant = 1.0
     MaximumNumberOfIterations = 20
     Tolerance = 0.01
+    Solver = 'Fixed Point'
+    AndersonDepth = 5
     
     ##
     ## Method contributed by Daniel Marmander of Natural Power
@@ -72,7 +75,7 @@ class MarmanderPowerCurveInterpolatorBase(BaseInterpolator):
         Status.add("Adjusted data points", verbosity=3)
         Status.add("X Y Error", verbosity=3)
 
-        for i in range(len(x)):
+        for i in range(len(self.x)):
             Status.add("{0} {1} {2}".format(self.x[i], self.adjustedBinPowers[i], self.errors[i]), verbosity=3)
 
         Status.add("Final Power Function:", verbosity=3)
@@ -86,6 +89,10 @@ class MarmanderPowerCurveInterpolatorBase(BaseInterpolator):
         
         return self.interpolator(x)
 
+    def evaluate_array(self, x):
+
+        return self.interpolator.evaluate_array(x)
+
     def prepare_limits_dict(self, x, x_limits, sub_power = None):
         
         try:
@@ -361,69 +368,98 @@ class MarmanderPowerCurveInterpolatorBase(BaseInterpolator):
 
         return limits
     
-    def fitpower(self,binCenters,binLimits,binAverages,adjust,adjustedBinPowers = None,iteration = 0):
+    def fitpower(self,binCenters,binLimits,binAverages,adjust):
 
-        if adjustedBinPowers == None:
-            adjustedBinPowers = binAverages
+        # find the bin powers whose interpolant averages back to the measured bin averages,
+        # iterating adjusted powers -> interpolant -> integrated bin averages
 
-        f = self.new_interpolator(binCenters, adjustedBinPowers, self.cutOutWindSpeed)
+        # sample points are the same on every iteration
+        integration = MarmanderIntegrationGrid([binLimits[binCenters[i]] for i in range(len(binCenters)) if adjust[i]], MarmanderPowerCurveInterpolatorBase.IntegrationStep)
 
-        intergatedPowers = []
-        errors = []
-        nextPowers = []
-        rmse = 0.0
-        rmse_count = 0
-        
-        for i,spd in enumerate(binCenters):
+        adjusted = np.array(adjust, dtype=bool)
+        targets = np.array(binAverages, dtype=float)[adjusted]
 
-            if adjust[i]:
+        solver = self.new_solver()
 
-                center = binCenters[i]
-                
-                intergatedPower = self.calculate_integrated_power(f, binLimits[center])
-                
-                error = intergatedPower - binAverages[i]
+        adjustedBinPowers = list(binAverages)
+        
+        self.residuals = []
+        
+        iteration = 0
 
-                nextPower = adjustedBinPowers[i] - MarmanderPowerCurveInterpolatorBase.ConvergenceConstant * error
-                
-                nextPowers.append(nextPower)
+        while True:
 
-                rmse += pow(error, 2.0)
-                rmse_count += 1
+            f = self.new_interpolator(binCenters, adjustedBinPowers, self.cutOutWindSpeed)
 
-                intergatedPowers.append(intergatedPower)
-                errors.append(error)
-                
-            else:
+            binErrors = integration.integrate(f) - targets
 
-                nextPowers.append(adjustedBinPowers[i])
-                intergatedPowers.append(None)
-                errors.append(None)
-                
-        rmse = sqrt(rmse/float(rmse_count))
+            rmse = sqrt(np.sum(binErrors ** 2) / float(len(binErrors)))
 
-        Status.add("Iteration: {0} {1}".format(iteration, rmse), verbosity=3)
-        
-        if rmse > MarmanderPowerCurveInterpolatorBase.Tolerance:
+            self.iterations = iteration
+            self.residuals.append(rmse)
 
+            Status.add("Iteration: {0} {1}".format(iteration, rmse), verbosity=3)
+
+            if rmse <= MarmanderPowerCurveInterpolatorBase.Tolerance:
+                break
+            
             if iteration > MarmanderPowerCurveInterpolatorBase.MaximumNumberOfIterations:
 
+                intergatedPowers, errors = self.bin_errors(adjust, targets, binErrors)
+
                 self.debugText = "Maximum number of iterations exceeded\n"
                 self.debugText += self.prepareDebugText(binCenters, binLimits,binAverages, adjustedBinPowers, adjust, intergatedPowers, errors, f)
 
                 Status.add(self.debugText, verbosity=3)
 
-                raise Exception("Could not converge fitted power curve (RMSE = {0}).".format(rmse))
+                raise Exception("Could not converge fitted power curve (RMSE = {0} after {1} iterations).".format(rmse, iteration))
+
+            powers = np.array(adjustedBinPowers, dtype=float)[adjusted]
+
+            nextPowers = solver.next(powers, powers - MarmanderPowerCurveInterpolatorBase.ConvergenceConstant * binErrors, rmse)
+
+            adjustedBinPowers = list(adjustedBinPowers)
+
+            for i, power in zip(np.flatnonzero(adjusted), nextPowers):
+                adjustedBinPowers[i] = float(power)
+
+            iteration += 1
+
+        Status.add("Fitted power curve converged after {0} iterations (RMSE = {1})".format(iteration, rmse), verbosity=3)
+            
+        intergatedPowers, errors = self.bin_errors(adjust, targets, binErrors)
+
+        if self.debug:
+            self.debugText = self.prepareDebugText(binCenters, binLimits, binAverages, adjustedBinPowers, adjust, intergatedPowers, errors, f)
+            
+        return f, adjustedBinPowers, errors
 
-            #iterate
-            return self.fitpower(binCenters,binLimits,binAverages,adjust,nextPowers,iteration+1)
+    def new_solver(self):
 
+        if MarmanderPowerCurveInterpolatorBase.Solver == 'Fixed Point':
+            return MarmanderFixedPointSolver()
+        elif MarmanderPowerCurveInterpolatorBase.Solver == 'Anderson':
+            return MarmanderAndersonSolver(MarmanderPowerCurveInterpolatorBase.AndersonDepth)
         else:
+            raise Exception("Unknown Marmander solver: {0}".format(MarmanderPowerCurveInterpolatorBase.Solver))
 
-            if self.debug:
-                self.debugText = self.prepareDebugText(binCenters, binLimits, binAverages, adjustedBinPowers, adjust, intergatedPowers, errors, f)
-                
-            return f, adjustedBinPowers, errors
+    def bin_errors(self, adjust, targets, binErrors):
+
+        intergatedPowers = []
+        errors = []
+
+        index = 0
+
+        for i in range(len(adjust)):
+            if adjust[i]:
+                intergatedPowers.append(float(targets[index] + binErrors[index]))
+                errors.append(float(binErrors[index]))
+                index += 1
+            else:
+                intergatedPowers.append(None)
+                errors.append(None)
+
+        return intergatedPowers, errors
 
     def calculate_integrated_power(self, f, limit):
         
@@ -453,20 +489,9 @@ class MarmanderPowerCurveInterpolatorBase(BaseInterpolator):
             
     def integrate_partition(self, f, start, end):
         
-        integrated_power = 0.0
-        wind_speed = start
-        step = 0.01
-        count = 0
-        
-        while wind_speed <= end:
-            power = f(wind_speed)
-            wind_speed += step
-            integrated_power += power
-            count += 1
-
-        integrated_power /= float(count)
+        wind_speeds = partition_wind_speeds(start, end, MarmanderPowerCurveInterpolatorBase.IntegrationStep)
 
-        return integrated_power
+        return np.sum(f.evaluate_array(wind_speeds)) / float(len(wind_speeds))
         
     def prepareDebugText(self, binCenters, binLimits, binAverages, adjustedBinPowers, adjust, intergatedPowers, errors, f):
 
@@ -518,6 +543,158 @@ class MarmanderLimitPartition:
             self.weight /= total_weight
 
 
+def partition_wind_speeds(start, end, step):
+
+    # the points visited by stepping from start to end in increments of step, accumulated
+    # one addition at a time so that rounding matches a scalar loop exactly
+
+    count = max(int((end - start) / step), 0) + 3
+
+    increments = np.empty(count)
+    increments[0] = start
+    increments[1:] = step
+
+    wind_speeds = np.add.accumulate(increments)
+
+    return wind_speeds[wind_speeds <= end]
+
+
+class MarmanderIntegrationGrid:
+
+    # all sample points of all bin partitions, so that bin averages of an interpolant
+    # are found with a single array evaluation
+
+    def __init__(self, limits, step):
+
+        wind_speeds = []
+        offsets = []
+        counts = []
+        weights = []
+        bins = []
+
+        position = 0
+
+        for i, limit in enumerate(limits):
+
+            total_weight = 0.0
+
+            for partition in limit.partitions:
+                total_weight += partition.weight
+
+            for partition in limit.partitions:
+
+                partition_speeds = partition_wind_speeds(partition.start, partition.end, step)
+
+                if len(partition_speeds) < 1:
+                    raise Exception("Cannot integrate partition {0} to {1}".format(partition.start, partition.end))
+
+                wind_speeds.append(partition_speeds)
+                offsets.append(position)
+                counts.append(len(partition_speeds))
+                bins.append(i)
+
+                if total_weight > 0.0:
+                    weights.append(partition.weight / total_weight)
+                else:
+                    weights.append(1.0 / float(len(limit.partitions)))
+
+                position += len(partition_speeds)
+
+        self.bin_count = len(limits)
+
+        if position > 0:
+            self.wind_speeds = np.concatenate(wind_speeds)
+        else:
+            self.wind_speeds = np.zeros(0)
+
+        self.offsets = np.array(offsets, dtype=int)
+        self.counts = np.array(counts, dtype=float)
+        self.weights = np.array(weights)
+        self.bins = np.array(bins, dtype=int)
+
+    def integrate(self, f):
+
+        if len(self.offsets) < 1:
+            return np.zeros(self.bin_count)
+
+        powers = f.evaluate_array(self.wind_speeds)
+
+        partition_powers = np.add.reduceat(powers, self.offsets) / self.counts
+
+        return np.bincount(self.bins, weights=partition_powers * self.weights, minlength=self.bin_count)
+
+
+class MarmanderFixedPointSolver:
+
+    # relaxed fixed point update: the powers proposed by the bin errors are taken as they are
+
+    def next(self, powers, proposed_powers, rmse):
+        return proposed_powers
+
+
+class MarmanderAndersonSolver:
+
+    # Anderson acceleration of the fixed point update: the next powers are the combination
+    # of the last few proposals which minimises the linearised residual
+
+    def __init__(self, depth):
+
+        self.depth = depth
+
+        # plain update from the powers with the lowest RMSE so far
+        self.best_rmse = None
+        self.best_proposed_powers = None
+        self.best_residuals = None
+
+        self.returned_to_best = False
+
+        self.restart()
+
+    def restart(self):
+
+        self.powers = []
+        self.residuals = []
+
+    def next(self, powers, proposed_powers, rmse):
+
+        # if an accelerated step made things worse, go back to the best powers
+        # and start again from a plain update there
+        if self.best_rmse != None and rmse > self.best_rmse and not self.returned_to_best:
+
+            self.restart()
+            self.returned_to_best = True
+
+            self.powers.append(self.best_proposed_powers)
+            self.residuals.append(self.best_residuals)
+
+            return self.best_proposed_powers
+
+        # a plain update from the best powers is kept even if it is no better
+        if self.best_rmse == None or rmse < self.best_rmse or self.returned_to_best:
+            self.best_rmse = rmse
+            self.best_proposed_powers = proposed_powers
+            self.best_residuals = proposed_powers - powers
+
+        self.returned_to_best = False
+
+        self.powers.append(proposed_powers)
+        self.residuals.append(proposed_powers - powers)
+
+        if len(self.powers) > self.depth + 1:
+            self.powers.pop(0)
+            self.residuals.pop(0)
+
+        if len(self.powers) < 2:
+            return proposed_powers
+
+        residual_differences = np.diff(np.array(self.residuals), axis=0).T
+        power_differences = np.diff(np.array(self.powers), axis=0).T
+
+        gamma = np.linalg.lstsq(residual_differences, self.residuals[-1])[0]
+
+        return proposed_powers - np.dot(power_differences, gamma)
+
+
 class MarmanderPowerCurveInterpolatorCubicSpline(MarmanderPowerCurveInterpolatorBase):
 
     def new_interpolator(self, binCenters, adjustedBinPowers, cutOutWindSpeed):
@@ -585,6 +762,14 @@ class MarmanderPowerCurveInterpolatorCubicFunction:
             else:
                 return float(self.linearInterpolator(x))
 
+    def evaluate_array(self, x):
+
+        x = np.asarray(x, dtype=float)
+
+        values = np.where(x < self.ratedWindSpeed, self.cubicInterpolator(x), self.linearInterpolator(x))
+
+        return np.where((x < self.cutInWindSpeed) | (x > self.cutOutWindSpeed), 0.0, values)
+
 class CubicHermitePowerCurveInterpolator(BaseInterpolator):
 
     def __init__(self, x, y, cutOutWindSpeed):
@@ -609,6 +794,14 @@ class CubicHermitePowerCurveInterpolator(BaseInterpolator):
         else:
             return float(self.interpolator(x))
 
+    def evaluate_array(self, x):
+
+        x = np.asarray(x, dtype=float)
+
+        outside = (x < self.first_value) | (x > self.last_value) | (x > self.cutOutWindSpeed)
+
+        return np.where(outside, 0.0, self.interpolator(x))
+
 class LinearPowerCurveInterpolator(BaseInterpolator):
 
     def __init__(self, x, y, cutOutWindSpeed):
@@ -622,6 +815,10 @@ class LinearPowerCurveInterpolator(BaseInterpolator):
             return 0.0
         else:
             return float(self.interpolator(x))
+
+    def evaluate_array(self, x):
+        x = np.asarray(x, dtype=float)
+        return np.where(x > self.cutOutWindSpeed, 0.0, self.interpolator(x))
     
 class LinearTurbulenceInterpolator:
 
@@ -631,6 +828,9 @@ class LinearTurbulenceInterpolator:
     def __call__(self, x):
         return float(self.interpolator(x))
 
+    def evaluate_array(self, x):
+        return self.interpolator(np.asarray(x, dtype=float))
+
 class CubicSplinePowerCurveInterpolator(BaseInterpolator):
 
     def __init__(self, x, y, cutOutWindSpeed):
@@ -654,4 +854,12 @@ class CubicSplinePowerCurveInterpolator(BaseInterpolator):
             if x > self.lastCubicWindSpeed:
                 return float(self.linearInterpolator(x))
             else:
-                return float(self.cubicInterpolator(x))
\ No newline at end of file
+                return float(self.cubicInterpolator(x))
+
+    def evaluate_array(self, x):
+
+        x = np.asarray(x, dtype=float)
+
+        values = np.where(x > self.lastCubicWindSpeed, self.linearInterpolator(x), self.cubicInterpolator(x))
+
+        return np.where(x > self.cutOutWindSpeed, 0.0, values)
\ No newline at end of file
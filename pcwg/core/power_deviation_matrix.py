@@ -221,8 +221,8 @@ class ResidualWindSpeedMatrix(AverageOfDeviationsMatrix):
 
         aggregations = Aggregations(0)
 
-        data_frame[wind_speed_dimension.bin_parameter] = data_frame[actual_wind_speed_column].map(wind_speed_dimension.bins.binCenter)
-        data_frame[turbulence_dimension.bin_parameter] = data_frame[turbulence_column].map(turbulence_dimension.bins.binCenter)
+        data_frame[wind_speed_dimension.bin_parameter] = wind_speed_dimension.bins.binCenters(data_frame[actual_wind_speed_column])
+        data_frame[turbulence_dimension.bin_parameter] = turbulence_dimension.bins.binCenters(data_frame[turbulence_column])
 
         AverageOfDeviationsMatrix.__init__(self, data_frame, actual_wind_speed_column, modelled_wind_speed_column,
                                            dimensions, aggregations)
@@ -248,4 +248,4 @@ class PowerDeviationMatrixDimension(object):
                          numberOfBins=numberOfBins)
 
     def create_column(self, dataFrame):
-        return dataFrame[self.parameter].map(self.bins.binCenter)
+        return self.bins.binCenters(dataFrame[self.parameter])
@@ -1,6 +1,41 @@
 import math
+import numpy as np
 from scipy import interpolate
 
+class ProfileInterpolation:
+
+    # bracketing indices and linear weights taking values measured at fixed (sorted) levels
+    # to fixed heights, reproducing interp1d/numpy.interp row by row
+
+    def __init__(self, levels, heights):
+
+        self.levels = np.asarray(levels, dtype=float)
+        self.heights = np.asarray(heights, dtype=float)
+
+        if len(self.heights) > 0 and (self.heights.min() < self.levels[0] or self.heights.max() > self.levels[-1]):
+            raise Exception("Cannot interpolate profile outside of measured levels ({0} to {1})".format(self.levels[0], self.levels[-1]))
+
+        self.lower = np.minimum(np.searchsorted(self.levels, self.heights, side='right') - 1, len(self.levels) - 2)
+        self.upper = self.lower + 1
+
+        self.spans = self.levels[self.upper] - self.levels[self.lower]
+        self.offsets = self.heights - self.levels[self.lower]
+
+        self.top = (self.heights == self.levels[-1])
+
+    def interpolate(self, values):
+
+        # (rows x levels) -> (rows x heights)
+
+        values = np.asarray(values, dtype=float)
+
+        lower_values = values[:, self.lower]
+
+        interpolated = (values[:, self.upper] - lower_values) / self.spans * self.offsets + lower_values
+        interpolated[:, self.top] = values[:, -1][:, np.newaxis]
+
+        return interpolated
+
 class NoneInterpolator:
 
     def __call__(self, level):
@@ -16,6 +51,8 @@ class ProfileLevels:
 
         self.rotorGeometry = rotorGeometry
 
+        self.interpolations = {}
+
     def getWindSpeedProfile(self, row):
         return self.create_interpolator(row, self.windSpeedLevels)
     
@@ -25,6 +62,41 @@ class ProfileLevels:
     def getUpflowProfile(self, row):
         return self.create_interpolator(row, self.upflowLevels)
 
+    def getWindSpeedProfiles(self, dataFrame, heights):
+        return self.create_profiles(dataFrame, self.windSpeedLevels, heights)
+
+    def getDirectionProfiles(self, dataFrame, heights):
+        return self.create_profiles(dataFrame, self.windDirectionLevels, heights)
+
+    def getUpflowProfiles(self, dataFrame, heights):
+        return self.create_profiles(dataFrame, self.upflowLevels, heights)
+
+    def create_profiles(self, dataFrame, levels_dict, heights):
+
+        if levels_dict is None:
+            return None
+
+        levels = self.profile_levels(levels_dict)
+
+        if len(levels) < 3:
+            return None
+
+        values = dataFrame[[levels_dict[level] for level in levels]].values
+
+        return self.profile_interpolation(levels, heights).interpolate(values)
+
+    def profile_levels(self, levels_dict):
+        return sorted(level for level in levels_dict if not levels_dict[level] is None)
+
+    def profile_interpolation(self, levels, heights):
+
+        key = (tuple(levels), tuple(heights))
+
+        if not key in self.interpolations:
+            self.interpolations[key] = ProfileInterpolation(levels, heights)
+
+        return self.interpolations[key]
+
     def create_interpolator(self, row, levels_dict):
 
         if levels_dict is None:
@@ -200,6 +272,10 @@ class InterpolatedHubWindSpeed(HubParameterBase):
 
         return self.profileLevels.getWindSpeedProfile(row)(self.rotorGeometry.hub_height)
 
+    def hubWindSpeeds(self, dataFrame):
+
+        return self.profileLevels.getWindSpeedProfiles(dataFrame, [self.rotorGeometry.hub_height])[:, 0]
+
 class PiecewiseHubBase(HubParameterBase):
 
     def __init__(self, profileLevels, rotorGeometry):        
@@ -226,6 +302,17 @@ class PiecewiseExponentHubWindSpeed(PiecewiseHubBase):
 
         return speedBelow * (self.rotorGeometry.hub_height / self.highestBelow) ** exponent
 
+    def hubWindSpeeds(self, dataFrame):
+
+        speeds = self.profileLevels.getWindSpeedProfiles(dataFrame, [self.highestBelow, self.lowestAbove])
+
+        speedBelow = speeds[:, 0]
+        speedAbove = speeds[:, 1]
+
+        exponent = np.log(speedAbove / speedBelow) / math.log(self.lowestAbove / self.highestBelow)
+
+        return speedBelow * (self.rotorGeometry.hub_height / self.highestBelow) ** exponent
+
 class PiecewiseInterpolationHubDirection(PiecewiseHubBase):
 
     def __init__(self, profileLevels, rotorGeometry):        
@@ -237,6 +324,8 @@ class PiecewiseInterpolationHubDirection(PiecewiseHubBase):
 
         self.x = [self.highestBelow, self.lowestAbove]
 
+        self.hub_interpolation = ProfileInterpolation(self.x, [self.rotorGeometry.hub_height])
+
     def bound_direction(self, direction):
 
         while direction < 0:
@@ -274,6 +363,27 @@ class PiecewiseInterpolationHubDirection(PiecewiseHubBase):
 
             return inter(self.rotorGeometry.hub_height)
 
+    def bound_directions(self, directions):
+
+        directions = np.where(directions < 0, directions + 360.0 * np.ceil(-directions / 360.0), directions)
+
+        return np.where(directions > 360.0, directions - 360.0 * np.ceil(directions / 360.0 - 1.0), directions)
+
+    def hubDirections(self, dataFrame):
+
+        below_directions = self.bound_directions(dataFrame[self.direction_below_col].values.astype(float))
+        above_directions = self.bound_directions(dataFrame[self.direction_above_col].values.astype(float))
+
+        wrapped = np.abs(below_directions - above_directions) > 180.0
+        below_greater = below_directions > above_directions
+
+        below_directions = np.where(wrapped & below_greater, below_directions - 360.0, below_directions)
+        above_directions = np.where(wrapped & ~below_greater, above_directions - 360.0, above_directions)
+
+        values = np.column_stack((below_directions, above_directions))
+
+        return self.hub_interpolation.interpolate(values)[:, 0]
+
 class RotorEquivalentWindSpeed:
 
     def __init__(self, profileLevels, rotor, hubWindSpeedCalculator, rewsVeer, rewsUpflow, exponent):        
@@ -328,6 +438,42 @@ class RotorEquivalentWindSpeed:
 
         return equivalentWindSpeed
         
+    def rewsValues(self, dataFrame):
+
+        heights = [level.level for level in self.rotor.levels]
+
+        speeds = self.profileLevels.getWindSpeedProfiles(dataFrame, heights)
+
+        if speeds is None:
+            raise Exception("Speed cannot be None")
+
+        if self.rewsVeer and not self.hubDirectionCalculator is None:
+            hub_directions = self.hubDirectionCalculator.hubDirections(dataFrame)
+            directions = self.profileLevels.getDirectionProfiles(dataFrame, heights)
+        else:
+            hub_directions = None
+            directions = None
+
+        if self.rewsUpflow:
+            upflows = self.profileLevels.getUpflowProfiles(dataFrame, heights)
+        else:
+            upflows = None
+
+        level_values = self.level_values(speeds, hub_directions, directions, upflows)
+
+        equivalentWindSpeeds = np.zeros(len(speeds))
+
+        for index, level in enumerate(self.rotor.levels):
+            equivalentWindSpeeds += level_values[:, index] ** self.exponent * level.areaFraction
+
+        return equivalentWindSpeeds ** (1.0 / self.exponent)
+
+    def level_values(self, speeds, hub_directions, directions, upflows):
+
+        return speeds \
+                         * self.direction_terms(hub_directions, directions) \
+                         * self.upflow_terms(speeds, upflows)
+
     def level_value(self, speed, level, hub_direction, direction_profile, upflow_profile):
 
         return speed \
@@ -340,6 +486,28 @@ class RotorEquivalentWindSpeed:
 
         return self.rews(row) / hub_speed
 
+    def rewsToHubRatios(self, dataFrame):
+
+        hub_speeds = self.hubWindSpeedCalculator.hubWindSpeeds(dataFrame)
+
+        return self.rewsValues(dataFrame) / hub_speeds
+
+    def direction_terms(self, hub_directions, directions):
+
+        if directions is None or hub_directions is None:
+            return 1.0
+
+        return np.cos(self.to_radians(directions) - self.to_radians(hub_directions)[:, np.newaxis])
+
+    def upflow_terms(self, speeds, upflows):
+
+        if upflows is None or self.tilt_rad is None:
+            return 1.0
+
+        upflow_rad = np.arctan2(upflows, speeds)
+
+        return np.cos(upflow_rad + self.tilt_rad) / (np.cos(upflow_rad) * math.cos(self.tilt_rad))
+
     def direction_term(self, level, hub_direction, direction_profile):
 
         if not self.rewsVeer:
@@ -381,9 +549,19 @@ class ProductionByHeight(RotorEquivalentWindSpeed):
     def level_value(self, speed, level, hub_direction, direction_profile, upflow_profile):
         return self.power_curve.power(speed)
 
+    def level_values(self, speeds, hub_directions, directions, upflows):
+        return self.power_curve.power_array(speeds.ravel()).reshape(speeds.shape)
+
     def calculate(self, row):
         
         hub_speed = self.hubWindSpeedCalculator.hubWindSpeed(row)
         hub_power = self.power_curve.power(hub_speed)
 
         return self.rews(row) - hub_power
+
+    def calculate_array(self, dataFrame):
+
+        hub_speeds = self.hubWindSpeedCalculator.hubWindSpeeds(dataFrame)
+        hub_powers = self.power_curve.power_array(hub_speeds)
+
+        return self.rewsValues(dataFrame) - hub_powers
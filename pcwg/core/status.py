@@ -1,16 +1,45 @@
+import threading
+
 import pandas as pd
 
 class Status:
 
     Instance = None
 
+    # messages added on a thread which is capturing are held back for replay
+    Captures = threading.local()
+
     @classmethod
     def set_verbosity(cls, verbosity):
         cls.get().verbosity = verbosity
 
     @classmethod
     def add(cls, message, red = False, orange=False, verbosity = 1):
-        cls.get().add_message(message, red, orange, verbosity)
+
+        captured = getattr(cls.Captures, 'messages', None)
+
+        if captured is not None:
+            captured.append((message, red, orange, verbosity))
+        else:
+            cls.get().add_message(message, red, orange, verbosity)
+
+    @classmethod
+    def start_capture(cls):
+        cls.Captures.messages = []
+
+    @classmethod
+    def end_capture(cls):
+
+        messages = cls.Captures.messages
+        cls.Captures.messages = None
+
+        return messages
+
+    @classmethod
+    def replay(cls, messages):
+
+        for message, red, orange, verbosity in messages:
+            cls.add(message, red, orange, verbosity)
 
     @classmethod
     def set_portfolio_status(cls, completed, total, finished):
@@ -0,0 +1,135 @@
+import datetime
+import re
+
+import numpy as np
+import pandas as pd
+
+
+class FixedWidthTimestampFormat:
+
+    # date formats made only of zero-padded numeric fields (e.g. %Y-%m-%d %H:%M or %d/%m/%Y %H:%M)
+    # and literal separators: every field sits at a known character offset, so a whole column
+    # can be decoded with array arithmetic on the raw bytes
+
+    Widths = {'Y': 4, 'm': 2, 'd': 2, 'H': 2, 'M': 2, 'S': 2}
+
+    def __init__(self, date_format):
+
+        self.fields = {}
+        self.literals = []
+
+        position = 0
+
+        tokens = re.findall('%.|[^%]', date_format)
+
+        if ''.join(tokens) != date_format:
+            raise ValueError("Cannot decode {0} as a fixed width format".format(date_format))
+
+        for token in tokens:
+
+            if token.startswith('%'):
+
+                directive = token[1]
+
+                if directive not in self.Widths or directive in self.fields:
+                    raise ValueError("Cannot decode {0} as a fixed width field".format(token))
+
+                self.fields[directive] = position
+                position += self.Widths[directive]
+
+            else:
+
+                self.literals.append((position, ord(token)))
+                position += 1
+
+        self.width = position
+
+    def parse(self, values):
+
+        # returns datetime64[ns] values, or None if any value does not fit the layout exactly
+
+        try:
+            # one spare character so that over-long values can be detected
+            text = np.asarray(values, dtype='S{0}'.format(self.width + 1))
+        except (UnicodeError, ValueError, TypeError):
+            return None
+
+        if len(text) == 0 or not (np.char.str_len(text) == self.width).all():
+            return None
+
+        characters = text.view(np.uint8).reshape(len(text), self.width + 1)
+
+        for position, character in self.literals:
+            if not (characters[:, position] == character).all():
+                return None
+
+        digits = characters[:, :self.width].astype(np.int64) - ord('0')
+
+        for directive, start in self.fields.items():
+            field_digits = digits[:, start:start + self.Widths[directive]]
+            if (field_digits < 0).any() or (field_digits > 9).any():
+                return None
+
+        # defaults as datetime.strptime
+        years = self.field(digits, 'Y', 1900)
+        months = self.field(digits, 'm', 1)
+        days = self.field(digits, 'd', 1)
+        hours = self.field(digits, 'H', 0)
+        minutes = self.field(digits, 'M', 0)
+        seconds = self.field(digits, 'S', 0)
+
+        if (months < 1).any() or (months > 12).any():
+            return None
+
+        month_numbers = (years - 1970) * 12 + (months - 1)
+
+        month_starts = month_numbers.astype('M8[M]').astype('M8[D]')
+        days_in_month = ((month_numbers + 1).astype('M8[M]').astype('M8[D]') - month_starts).astype(np.int64)
+
+        if (days < 1).any() or (days > days_in_month).any():
+            return None
+
+        if (hours > 23).any() or (minutes > 59).any() or (seconds > 59).any():
+            return None
+
+        time_of_day = (hours * 3600 + minutes * 60 + seconds).astype('m8[s]')
+
+        return (month_starts + (days - 1).astype('m8[D]')).astype('M8[s]') + time_of_day
+
+    def field(self, digits, directive, default):
+
+        value = np.zeros(len(digits), dtype=np.int64)
+
+        if directive not in self.fields:
+            return value + default
+
+        start = self.fields[directive]
+
+        for i in range(start, start + self.Widths[directive]):
+            value = value * 10 + digits[:, i]
+
+        return value
+
+
+def parse_timestamps(values, date_format, name=None):
+
+    # vectorised equivalent of datetime.strptime(value, date_format) for each value
+
+    try:
+        fixed_width = FixedWidthTimestampFormat(date_format)
+    except ValueError:
+        fixed_width = None
+
+    if fixed_width is not None:
+
+        parsed = fixed_width.parse(values)
+
+        if parsed is not None:
+            return pd.DatetimeIndex(parsed, name=name)
+
+    try:
+        return pd.DatetimeIndex(pd.to_datetime(values, format=date_format), name=name)
+    except (ValueError, TypeError):
+        pass
+
+    return pd.DatetimeIndex([datetime.datetime.strptime(value, date_format) for value in values], name=name)
@@ -1,4 +1,7 @@
 import math
+import hashlib
+import threading
+import collections
 import interpolators
 import scipy.interpolate
 import numpy as np
@@ -20,6 +23,9 @@ class Relaxation(object):
 
 
 class NoRelaxation(object):
+
+    # equivalent relaxation factor, used to identify cached zero turbulence curves
+    correction = 1.0
     
     def relax(self, wind_speed,turbulence):
 
@@ -93,6 +99,8 @@ class PowerCurve(object):
         self._reverted_simulated_power = None
         self._reverted_zero_turbulence_power_curve = None
 
+        self.simulated_power_lookup = None
+
         self.relaxation = relaxation
 
         self.zero_ti_pc_required = zero_ti_pc_required
@@ -137,9 +145,12 @@ class PowerCurve(object):
         self._reverted_simulated_power = None
         self._reverted_zero_turbulence_power_curve = None
 
+        self.simulated_power_lookup = None
+
     def update_zero_ti(self, relaxation=None):
 
         self._reverted_relaxation = self.relaxation
+        self.simulated_power_lookup = None
 
         if hasattr(self, 'simulatedPower'):
             self._reverted_simulated_power = self.simulatedPower
@@ -187,30 +198,35 @@ class PowerCurve(object):
 
         integration_range = IntegrationRange(0.0, 100.0, 0.1)
 
-        wind_speeds = []
-        powers = []
-        turbulence_values = []
-        
-        for index in self.data_frame.index:
+        wind_speeds = self.data_frame[self.wind_speed_column].values.astype(float)
+        powers = self.data_frame[self.power_column].values.astype(float)
+        turbulence_values = self.data_frame[self.turbulence_column].values.astype(float)
 
-            wind_speed = self.data_frame.loc[index, self.wind_speed_column]
-            power = self.data_frame.loc[index, self.power_column]
-            turbulence = self.data_frame.loc[index, self.turbulence_column]
-
-            if not np.isnan(wind_speed) and \
-               not np.isnan(power) and \
-               not np.isnan(turbulence) and \
-               wind_speed >= 0.0 and \
-               power >= 0.0 and \
-               turbulence > 0:
-
-                wind_speeds.append(wind_speed)
-                turbulence_values.append(turbulence)
-                powers.append(power)
-        
-        self.zeroTurbulencePowerCurve = ZeroTurbulencePowerCurve(wind_speeds,
-                                                                 powers,
-                                                                 turbulence_values,
+        # NaN fails every comparison
+        with np.errstate(invalid='ignore'):
+            valid = (wind_speeds >= 0.0) & (powers >= 0.0) & (turbulence_values > 0)
+
+        wind_speeds = wind_speeds[valid]
+        powers = powers[valid]
+        turbulence_values = turbulence_values[valid]
+
+        key = ZeroTurbulencePowerCurveCache.key(wind_speeds,
+                                                powers,
+                                                turbulence_values,
+                                                integration_range,
+                                                self.available_power,
+                                                self.relaxation)
+
+        cached = ZeroTurbulencePowerCurveCache.get(key)
+
+        if cached is not None:
+            Status.add("Zero turbulence curve for {0} Power Curve found in cache".format(self.name), verbosity=3)
+            self.zeroTurbulencePowerCurve, self.simulatedPower = cached
+            return
+
+        self.zeroTurbulencePowerCurve = ZeroTurbulencePowerCurve(wind_speeds.tolist(),
+                                                                 powers.tolist(),
+                                                                 turbulence_values.tolist(),
                                                                  integration_range,
                                                                  self.available_power,
                                                                  self.reference_density,
@@ -218,6 +234,8 @@ class PowerCurve(object):
 
         self.simulatedPower = SimulatedPower(self.zeroTurbulencePowerCurve, integration_range)
 
+        ZeroTurbulencePowerCurveCache.store(key, (self.zeroTurbulencePowerCurve, self.simulatedPower))
+
     def get_rated_power(self, rated_power, power_curve_levels):
 
         if rated_power is None:
@@ -347,6 +365,58 @@ class PowerCurve(object):
 
         return power
 
+    def power_array(self, wind_speeds, turbulences=None, augment_turbulence_correction=False,
+                    normalised_wind_speeds=None):
+
+        if augment_turbulence_correction and normalised_wind_speeds is None:
+            raise Exception('normalised_wind_speeds cannot be None if augment_turbulence_correction=True')
+
+        wind_speeds = np.asarray(wind_speeds, dtype=float)
+
+        reference_powers = self.power_function.evaluate_array(wind_speeds)
+
+        if turbulences is None:
+            powers = reference_powers
+        else:
+
+            turbulences = np.asarray(turbulences, dtype=float)
+
+            reference_turbulences = self.reference_turbulence_array(wind_speeds)
+
+            simulated_powers_site = self.simulated_power_array(wind_speeds,
+                                                               self.relaxation.relax(wind_speeds,
+                                                                                     turbulences))
+
+            simulated_powers_reference = self.simulated_power_array(wind_speeds,
+                                                                    self.relaxation.relax(wind_speeds,
+                                                                                          reference_turbulences))
+
+            powers = reference_powers + (simulated_powers_site - simulated_powers_reference)
+
+            if augment_turbulence_correction:
+                empirical = AugmentedTurbulenceCorrection()
+                deviations = empirical.calculate_array(normalised_wind_speeds,
+                                                       turbulences,
+                                                       reference_turbulences)
+                powers = powers * (1.0 + deviations)
+
+        # where() rather than clip() so that NaNs are treated as in power()
+        powers = np.where(powers > 0.0, powers, 0.0)
+        powers = np.where(powers < self.rated_power, powers, self.rated_power)
+
+        return powers
+
+    def simulated_power_array(self, wind_speeds, turbulences):
+
+        if len(wind_speeds) < SimulatedPowerLookup.MinimumRows:
+            return self.simulatedPower.power_array(wind_speeds, turbulences)
+
+        if self.simulated_power_lookup is None:
+            Status.add("Building simulated power lookup for {0} Power Curve".format(self.name), verbosity=3)
+            self.simulated_power_lookup = SimulatedPowerLookup(self.simulatedPower)
+
+        return self.simulated_power_lookup.power_array(wind_speeds, turbulences)
+
     def augment_turbulence_correction(self, normalised_wind_speed, turbulence, reference_turbulence):
 
         empirical = AugmentedTurbulenceCorrection()
@@ -360,6 +430,16 @@ class PowerCurve(object):
             return self.turbulence_function(self.cut_out_wind_speed)
         else:
             return self.turbulence_function(wind_speed)
+
+    def reference_turbulence_array(self, wind_speeds):
+
+        wind_speeds = np.asarray(wind_speeds, dtype=float)
+
+        bounded_wind_speeds = np.where(wind_speeds < self.first_wind_speed, self.first_wind_speed, wind_speeds)
+        bounded_wind_speeds = np.where(wind_speeds > self.cut_out_wind_speed, self.cut_out_wind_speed,
+                                       bounded_wind_speeds)
+
+        return self.turbulence_function.evaluate_array(bounded_wind_speeds)
             
     def calculate_cut_in_wind_speed(self):
         return min(self.non_zero_levels())
@@ -421,6 +501,18 @@ class IntegrationProbabilities:
         self.wind_speeds = wind_speeds
         self.a = wind_speed_step / math.sqrt(2.0 * math.pi)
                 
+    def probability_matrix(self, wind_speeds, wind_speed_means, wind_speed_std_devs):
+
+        # one row per (mean, standard deviation) pair, one column per integration wind speed
+        one_over_standard_deviations = 1.0 / wind_speed_std_devs[:, np.newaxis]
+
+        b = self.a * one_over_standard_deviations
+
+        wind_speed_minus_means = (wind_speeds[np.newaxis, :] - wind_speed_means[:, np.newaxis])
+        d = -0.5 * (wind_speed_minus_means * one_over_standard_deviations) ** 2
+
+        return b * np.exp(d)
+
     def probabilities(self, wind_speed_mean, wind_speed_std__dev):
         if wind_speed_std__dev == 0:
             return np.nan
@@ -453,6 +545,16 @@ class IntegrationRange:
     def probabilities(self, wind_speed_mean, wind_speed_std_dev):
         return self.integrationProbabilities.probabilities(wind_speed_mean, wind_speed_std_dev)
 
+    def probability_matrix(self, wind_speeds, wind_speed_means, wind_speed_std_devs):
+        return self.integrationProbabilities.probability_matrix(wind_speeds, wind_speed_means, wind_speed_std_devs)
+
+    def window(self, lower_wind_speed, upper_wind_speed):
+
+        start = np.searchsorted(self.wind_speeds, lower_wind_speed, side='left')
+        end = np.searchsorted(self.wind_speeds, upper_wind_speed, side='right')
+
+        return slice(start, end)
+
 
 class AvailablePower(object):
 
@@ -474,6 +576,82 @@ class AvailablePower(object):
         else:
             return 0.0
 
+    def power_coefficients(self, wind_speeds, actual_powers):
+
+        powers = self.power(wind_speeds)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(powers > 0, actual_powers / powers, 0.0)
+
+class ZeroTurbulencePowerCurveCache(object):
+
+    # In-memory cache of solved zero turbulence curves (and their simulated power), shared by
+    # all power curves with the same reference levels, density, rotor area and relaxation.
+    # Cached curves are never modified once solved. Entries are evicted least recently used
+    # first, and access is locked as curves may be built from several threads.
+
+    Enabled = True
+    MaximumSize = 64
+
+    Entries = collections.OrderedDict()
+    Lock = threading.Lock()
+
+    @classmethod
+    def key(cls, wind_speeds, powers, turbulence_values, integration_range, available_power, relaxation):
+
+        sha1 = hashlib.sha1()
+
+        for values in [wind_speeds, powers, turbulence_values]:
+            sha1.update(np.ascontiguousarray(values, dtype=float).tostring())
+            sha1.update('|')
+
+        sha1.update(repr((len(wind_speeds),
+                          integration_range.minimum_wind_speed,
+                          integration_range.maximum_wind_speed,
+                          integration_range.wind_speed_step,
+                          available_power.density,
+                          available_power.area,
+                          relaxation.correction)))
+
+        return sha1.hexdigest()
+
+    @classmethod
+    def get(cls, key):
+
+        if not cls.Enabled:
+            return None
+
+        with cls.Lock:
+
+            entry = cls.Entries.pop(key, None)
+
+            if entry is not None:
+                # most recently used entries are kept last
+                cls.Entries[key] = entry
+
+            return entry
+
+    @classmethod
+    def store(cls, key, entry):
+
+        if not cls.Enabled:
+            return
+
+        with cls.Lock:
+
+            cls.Entries.pop(key, None)
+            cls.Entries[key] = entry
+
+            while len(cls.Entries) > cls.MaximumSize:
+                cls.Entries.popitem(last=False)
+
+    @classmethod
+    def clear(cls):
+
+        with cls.Lock:
+            cls.Entries.clear()
+
+
 class ZeroTurbulencePowerCurve(object):
 
     def __init__(self,
@@ -540,6 +718,20 @@ class ZeroTurbulencePowerCurve(object):
         else:
             return self.powerFunction(wind_speed)
 
+    def power_array(self, wind_speeds):
+
+        wind_speeds = np.asarray(wind_speeds, dtype=float)
+
+        powers = np.zeros(wind_speeds.shape)
+
+        above = wind_speeds > self.last_wind_speed
+        inside = ~(wind_speeds < self.min_wind_speed) & ~above
+
+        powers[above] = self.last_power
+        powers[inside] = self.powerFunction(wind_speeds[inside])
+
+        return powers
+
 
 class InitialZeroTurbulencePowerCurve(object):
 
@@ -554,6 +746,9 @@ class InitialZeroTurbulencePowerCurve(object):
 
         self.max_iterations = 5
 
+        # convergence check of each iteration, for diagnostics
+        self.convergence_checks = []
+
         self.density = density
 
         self.integration_range = integration_range
@@ -584,21 +779,38 @@ class InitialZeroTurbulencePowerCurve(object):
         self.wind_speeds = selected_iteration.wind_speeds
         self.powers = selected_iteration.powers
         self.power = selected_iteration.power
+        self.power_array = selected_iteration.power_array
 
-    def solve(self, previous_iteration_stats, iteration_count=1):
-        
-        if iteration_count > self.max_iterations:
-            raise Exception("Failed to solve initial zero turbulence curve in permitted number of iterations")
+    def solve(self, reference_stats):
+
+        iteration_stats = reference_stats
+
+        for iteration_count in range(1, self.max_iterations + 1):
+
+            convergence_check = self.iterate(iteration_stats)
 
-        previous_rated_power = previous_iteration_stats.rated_power
-        previous_cut_in_wind_speed = previous_iteration_stats.cut_in_wind_speed
-        previous_cp_max = previous_iteration_stats.cp_max
+            self.convergence_checks.append(convergence_check)
+
+            Status.add("Initial zero turbulence curve iteration {0}: rated power diff {1}, cut-in diff {2}, cp max diff {3}"
+                       .format(iteration_count,
+                               convergence_check.rated_power_diff,
+                               convergence_check.cut_in_diff,
+                               convergence_check.cp_max_diff), verbosity=3)
+
+            if convergence_check.isConverged:
+                return iteration_stats
+
+            iteration_stats = IncrementedPowerCurveStats(iteration_stats, convergence_check)
+
+        raise Exception("Failed to solve initial zero turbulence curve in permitted number of iterations")
+
+    def iterate(self, iteration_stats):
 
         iteration_zero_turbulence_curve = InitialZeroTurbulencePowerCurveIteration(self.integration_range.wind_speeds,
                                                                                    self.available_power,
-                                                                                   previous_rated_power,
-                                                                                   previous_cut_in_wind_speed,
-                                                                                   previous_cp_max,
+                                                                                   iteration_stats.rated_power,
+                                                                                   iteration_stats.cut_in_wind_speed,
+                                                                                   iteration_stats.cp_max,
                                                                                    self.density)
 
         iteration_simulated_curve = SimulatedPowerCurve(self.reference_wind_speeds,
@@ -611,14 +823,8 @@ class InitialZeroTurbulencePowerCurve(object):
                                                                    iteration_simulated_curve.powers,
                                                                    self.available_power)
         
-        convergence_check = IterationPowerCurveConvergenceCheck(self.reference_power_curve_stats,
-                                                                iteration_simulated_curve_stats)
-
-        if convergence_check.isConverged:
-            return previous_iteration_stats
-        else:
-            incremented_stats = IncrementedPowerCurveStats(previous_iteration_stats, convergence_check)
-            return self.solve(incremented_stats, iteration_count + 1)
+        return IterationPowerCurveConvergenceCheck(self.reference_power_curve_stats,
+                                                   iteration_simulated_curve_stats)
 
 
 class IterationPowerCurveConvergenceCheck(object):
@@ -665,7 +871,6 @@ class InitialZeroTurbulencePowerCurveIteration(object):
     def __init__(self, wind_speeds, available_power, rated_power, cut_in_wind_speed, cp_max, density):
 
         self.wind_speeds = wind_speeds
-        self.powers = []
 
         self.rated_wind_speed = ((2.0 * rated_power * 1000.0) /
                                  (density * cp_max * available_power.area)) ** (1.0 / 3.0)
@@ -676,8 +881,7 @@ class InitialZeroTurbulencePowerCurveIteration(object):
         
         self.availablePower = available_power
                 
-        for wind_speed in self.wind_speeds:
-            self.powers.append(self.power(wind_speed))
+        self.powers = self.power_array(self.wind_speeds)
 
     def power(self, wind_speed):
 
@@ -689,49 +893,52 @@ class InitialZeroTurbulencePowerCurveIteration(object):
         else:
             return 0.0
 
+    def power_array(self, wind_speeds):
 
-class IterationPowerCurveStats(object):
+        wind_speeds = np.asarray(wind_speeds, dtype=float)
 
-    def __init__(self, wind_speeds, powers, available_power):
+        powers = np.where(wind_speeds < self.rated_wind_speed,
+                          self.availablePower.power(wind_speeds) * self.cp_max,
+                          self.rated_power)
 
-        self.rated_power = max(powers)
+        return np.where(wind_speeds > self.cut_in_wind_speed, powers, 0.0)
 
-        threshold_power = self.rated_power * 0.001
 
-        operating_wind_speeds = []
-        cps = []
+class IterationPowerCurveStats(object):
 
-        for i in range(len(wind_speeds)):
+    def __init__(self, wind_speeds, powers, available_power):
 
-            wind_speed = wind_speeds[i]
-            power = powers[i]
+        wind_speeds = np.asarray(wind_speeds, dtype=float)
+        powers = np.asarray(powers, dtype=float)
 
-            cps.append(available_power.power_coefficient(wind_speed, power))
+        self.rated_power = np.max(powers)
 
-            if power >= threshold_power:
-                operating_wind_speeds.append(wind_speed)
+        threshold_power = self.rated_power * 0.001
 
-        self.cp_max = max(cps)
+        self.cp_max = np.max(available_power.power_coefficients(wind_speeds, powers))
+
+        operating_wind_speeds = wind_speeds[powers >= threshold_power]
 
         if len(operating_wind_speeds) > 0:
-            self.cut_in_wind_speed = min(operating_wind_speeds)
+            self.cut_in_wind_speed = np.min(operating_wind_speeds)
         else:
             self.cut_in_wind_speed = 0.0
 
 
 class SimulatedPower(object):
 
+    # rows evaluated per (rows x integration points) batch in power_array
+    ChunkSize = 2000
+
+    # integration is truncated at this many standard deviations either side of the mean
+    SigmaLimit = 8.0
+
     def __init__(self, zero_turbulence_power_curve, integration_range):
         
         self.zero_turbulence_power_curve = zero_turbulence_power_curve
         self.integration_range = integration_range
                 
-        integration_powers = []
-
-        for wind_speed in np.nditer(self.integration_range.wind_speeds):
-                integration_powers.append(self.zero_turbulence_power_curve.power(wind_speed))
-
-        self.integrationPowers = np.array(integration_powers)
+        self.integrationPowers = self.zero_turbulence_power_curve.power_array(self.integration_range.wind_speeds)
         
     def power(self, wind_speed, turbulence):
         if wind_speed > 0:
@@ -741,6 +948,169 @@ class SimulatedPower(object):
         else:
             return 0.0
 
+    def power_array(self, wind_speeds, turbulences):
+
+        wind_speeds = np.asarray(wind_speeds, dtype=float)
+        turbulences = np.broadcast_to(np.asarray(turbulences, dtype=float), wind_speeds.shape)
+
+        standard_deviations = wind_speeds * turbulences
+
+        powers = np.zeros(wind_speeds.shape)
+
+        # as in power(): zero below zero wind speed and NaN for a degenerate distribution
+        active = wind_speeds > 0
+        degenerate = active & ~(np.abs(standard_deviations) > 0)
+        active &= ~degenerate
+
+        powers[degenerate] = np.nan
+
+        # sorting keeps the integration window of each chunk narrow
+        rows = np.flatnonzero(active)
+        rows = rows[np.argsort(wind_speeds[rows], kind='mergesort')]
+
+        for start in range(0, len(rows), SimulatedPower.ChunkSize):
+            chunk = rows[start:start + SimulatedPower.ChunkSize]
+            powers[chunk] = self.chunk_powers(wind_speeds[chunk], standard_deviations[chunk])
+
+        return powers
+
+    def chunk_powers(self, wind_speeds, standard_deviations):
+
+        half_widths = SimulatedPower.SigmaLimit * np.abs(standard_deviations)
+
+        window = self.integration_range.window(np.min(wind_speeds - half_widths),
+                                               np.max(wind_speeds + half_widths))
+
+        integration_wind_speeds = self.integration_range.wind_speeds[window]
+
+        probabilities = self.integration_range.probability_matrix(integration_wind_speeds,
+                                                                  wind_speeds,
+                                                                  standard_deviations)
+
+        outside = np.abs(integration_wind_speeds[np.newaxis, :] - wind_speeds[:, np.newaxis]) \
+            > half_widths[:, np.newaxis]
+
+        probabilities[outside] = 0.0
+
+        total_probabilities = probabilities.sum(axis=1)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            powers = probabilities.dot(self.integrationPowers[window]) / total_probabilities
+
+        # distributions with no weight inside the window fall back to the full integration
+        for i in np.flatnonzero(~(total_probabilities > 0)):
+            powers[i] = self.power(wind_speeds[i], standard_deviations[i] / wind_speeds[i])
+
+        return powers
+
+
+class SimulatedPowerLookup(object):
+
+    # batches smaller than this are cheaper to integrate directly
+    MinimumRows = 100000
+
+    WindSpeedStep = 0.05
+    TurbulenceStep = 0.005
+
+    MaximumWindSpeed = 40.0
+    MaximumTurbulence = 0.5
+
+    # maximum permitted interpolation error (kW) at the centre of a cell
+    Tolerance = 0.1
+
+    def __init__(self,
+                 simulated_power,
+                 wind_speed_step=None,
+                 turbulence_step=None,
+                 maximum_wind_speed=None,
+                 maximum_turbulence=None,
+                 tolerance=None):
+
+        self.simulated_power = simulated_power
+
+        self.wind_speed_step = self.default(wind_speed_step, SimulatedPowerLookup.WindSpeedStep)
+        self.turbulence_step = self.default(turbulence_step, SimulatedPowerLookup.TurbulenceStep)
+        self.tolerance = self.default(tolerance, SimulatedPowerLookup.Tolerance)
+
+        maximum_wind_speed = self.default(maximum_wind_speed, SimulatedPowerLookup.MaximumWindSpeed)
+        maximum_turbulence = self.default(maximum_turbulence, SimulatedPowerLookup.MaximumTurbulence)
+
+        self.wind_speed_count = int(round(maximum_wind_speed / self.wind_speed_step)) + 1
+        self.turbulence_count = int(round(maximum_turbulence / self.turbulence_step)) + 1
+
+        wind_speeds = np.arange(self.wind_speed_count) * self.wind_speed_step
+        turbulences = np.arange(self.turbulence_count) * self.turbulence_step
+
+        self.powers = self.tabulate(wind_speeds, turbulences)
+
+        # cells are only used where they reproduce the integral at their centre within tolerance
+        center_powers = self.tabulate(wind_speeds[:-1] + 0.5 * self.wind_speed_step,
+                                      turbulences[:-1] + 0.5 * self.turbulence_step)
+
+        interpolated_center_powers = 0.25 * (self.powers[:-1, :-1] + self.powers[1:, :-1]
+                                             + self.powers[:-1, 1:] + self.powers[1:, 1:])
+
+        self.valid_cells = np.abs(interpolated_center_powers - center_powers) <= self.tolerance
+
+        # the integral itself is not smooth when the distribution is narrower than the integration step
+        minimum_standard_deviations = np.outer(wind_speeds[:-1], turbulences[:-1])
+        self.valid_cells &= minimum_standard_deviations >= simulated_power.integration_range.wind_speed_step
+
+        Status.add("Simulated power lookup: {0:.1f}% of cells within tolerance"
+                   .format(100.0 * self.valid_cells.mean()), verbosity=3)
+
+    def default(self, value, default_value):
+
+        if value is None:
+            return default_value
+        else:
+            return value
+
+    def tabulate(self, wind_speeds, turbulences):
+
+        grid_wind_speeds, grid_turbulences = np.meshgrid(wind_speeds, turbulences, indexing='ij')
+
+        powers = self.simulated_power.power_array(grid_wind_speeds.ravel(), grid_turbulences.ravel())
+
+        return powers.reshape(grid_wind_speeds.shape)
+
+    def power_array(self, wind_speeds, turbulences):
+
+        wind_speeds = np.asarray(wind_speeds, dtype=float)
+        turbulences = np.broadcast_to(np.asarray(turbulences, dtype=float), wind_speeds.shape)
+
+        x = wind_speeds / self.wind_speed_step
+        y = turbulences / self.turbulence_step
+
+        with np.errstate(invalid='ignore'):
+            in_table = (x >= 0) & (x < self.wind_speed_count - 1) & (y >= 0) & (y < self.turbulence_count - 1)
+
+        rows = np.flatnonzero(in_table)
+
+        i = np.floor(x[rows]).astype(int)
+        j = np.floor(y[rows]).astype(int)
+
+        valid = self.valid_cells[i, j]
+
+        rows, i, j = rows[valid], i[valid], j[valid]
+
+        fx = x[rows] - i
+        fy = y[rows] - j
+
+        powers = np.empty(wind_speeds.shape)
+
+        powers[rows] = (1.0 - fx) * (1.0 - fy) * self.powers[i, j] \
+            + fx * (1.0 - fy) * self.powers[i + 1, j] \
+            + (1.0 - fx) * fy * self.powers[i, j + 1] \
+            + fx * fy * self.powers[i + 1, j + 1]
+
+        remaining = np.ones(wind_speeds.shape, dtype=bool)
+        remaining[rows] = False
+
+        powers[remaining] = self.simulated_power.power_array(wind_speeds[remaining], turbulences[remaining])
+
+        return powers
+
 
 class SimulatedPowerCurve(object):
 
@@ -751,15 +1121,10 @@ class SimulatedPowerCurve(object):
         self.relaxation = relaxation
         self.wind_speeds = wind_speeds
         self.turbulence_values = turbulence_values
-        self.powers = []
 
-        for i in range(len(wind_speeds)):
+        wind_speed_array = np.array(wind_speeds, dtype=float)
 
-            wind_speed = wind_speeds[i]
+        turbulences = self.relaxation.relax(wind_speed_array,
+                                            np.array(turbulence_values, dtype=float))
 
-            turbulence = self.relaxation.relax(wind_speed,
-                                               turbulence_values[i])
-            
-            power = self.simulated_power.power(wind_speed, turbulence)
-
-            self.powers.append(power)
+        self.powers = list(self.simulated_power.power_array(wind_speed_array, turbulences))
@@ -99,7 +99,7 @@ class Analysis:
 		self.aggregations = binning.Aggregations(minimumCount=1)
 
 		dataFrame = pd.read_csv(config.inputTimeSeriesPath, index_col=config.timeStamp, parse_dates = True, date_parser = dateConverter, sep = '\t', skiprows = config.headerRows).replace(config.badData, np.nan)
-		dataFrame[self.windSpeedBin] = dataFrame[config.inputHubWindSpeed].map(self.windSpeedBins.binCenter)
+		dataFrame[self.windSpeedBin] = self.windSpeedBins.binCenters(dataFrame[config.inputHubWindSpeed])
 
 		powers = dataFrame[config.actualPower].groupby(dataFrame[self.windSpeedBin]).aggregate(self.aggregations.average)
 		stdErrorPowers = dataFrame[config.actualPower].groupby(dataFrame[self.windSpeedBin]).aggregate(self.aggregations.standardError)
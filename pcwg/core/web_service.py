@@ -74,4 +74,6 @@ class WebService:
                     self.next_update += 0.1
             
         return power * (1 + deviation)
-        
\ No newline at end of file
+
+    def powers(self, data_frame):
+        return data_frame.apply(self.power, axis=1)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import xlrd
 from xlutils.copy import copy
 from copy import deepcopy
@@ -516,7 +517,8 @@ class ScatterPlotSheet(object):
 
         sh = self.sheet
         
-        plt_path = 'Temp'
+        # a private folder, so concurrent reports (e.g. portfolio workers) cannot collide
+        plt_path = tempfile.mkdtemp()
         plotter = MatplotlibPlotter(plt_path, self.analysis)
 
         conf = self.analysis.datasetConfigs[0]
@@ -535,7 +537,7 @@ class ScatterPlotSheet(object):
         try:
             rmtree(plt_path)
         except:
-            Status.add('Could not delete folder %s' % (os.getcwd() + os.sep + plt_path), verbosity=2)
+            Status.add('Could not delete folder %s' % plt_path, verbosity=2)
 
 class TimeSeriesSheet:
 
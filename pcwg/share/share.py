@@ -6,19 +6,27 @@ Created on Thu Apr 28 19:18:27 2016
 """
 import os
 import os.path
+import json
+import cPickle
 import zipfile
 import hashlib
 import datetime
+import tempfile
+import multiprocessing
 
-from shutil import copyfile
+from multiprocessing.pool import ThreadPool
+from shutil import copyfile, rmtree
 
 import numpy as np
 
 from ..core.dataset import Dataset
+from ..core.dataset_cache import FileDigests
+from ..core.dataset_cache import replace_file
 from ..core.analysis import Analysis
 from ..core.binning import Bins
 from ..core.binning import DirectionBins
 from ..core.power_deviation_matrix import NullDeviationMatrixDefinition
+from ..core.interpolators import MarmanderPowerCurveInterpolatorBase
 
 from ..reporting.data_sharing_reports import PCWGShareXReport, PortfolioReport
 from ..configuration.dataset_configuration import DatasetConfiguration
@@ -34,30 +42,150 @@ import version as ver
 
 class ValidRangeCache(object):
 
-    Paths = {}
+    # Inner range trial results, persisted between runs. Entries are keyed on the
+    # content hashes of the dataset configuration and time series and each is saved
+    # to its own file, so runs on different datasets never write the same file.
+    # An entry is dropped once either hash changes for the same configuration path.
+
+    Enabled = True
+    Folder = os.path.join(tempfile.gettempdir(), 'pcwg_valid_range_cache')
+    Extension = '.json'
+
+    Entries = None
+
+    @classmethod
+    def key(cls, configuration_id, time_series_id):
+        return "{0}-{1}".format(configuration_id, time_series_id)
+
+    @classmethod
+    def entry_path(cls, key):
+        return os.path.join(ValidRangeCache.Folder, key + ValidRangeCache.Extension)
+
+    @classmethod
+    def get_entries(cls):
+
+        if ValidRangeCache.Entries is None:
+            ValidRangeCache.Entries = {}
+
+        return ValidRangeCache.Entries
 
     @classmethod
-    def register(cls, path, range, valid):
+    def get_entry(cls, key):
+
+        entries = cls.get_entries()
 
-        if path not in ValidRangeCache.Paths:
-            ValidRangeCache.Paths[path] = {}
+        if key not in entries:
+            entries[key] = cls.read(cls.entry_path(key))
 
-        ValidRangeCache.Paths[path][range] = valid
+        return entries[key]
 
     @classmethod
-    def is_known(cls, path, range):
+    def read(cls, path):
+
+        if not ValidRangeCache.Enabled or not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (IOError, ValueError) as e:
+            Status.add("Cannot read valid range cache entry {0}: {1}".format(path, e), verbosity=2)
+            return None
+
+    @classmethod
+    def register(cls, key, path, range, trial_valid, complete_bins, valid):
+
+        entries = cls.get_entries()
+
+        if cls.get_entry(key) is None:
 
-        if not path in ValidRangeCache.Paths:
+            # results for an earlier version of this dataset are stale
+            for stale_key in [k for k in entries if entries[k] is not None and entries[k]['path'] == path]:
+                del entries[stale_key]
+
+            entries[key] = {'path': path, 'ranges': {}}
+
+        entries[key]['ranges'][range] = [trial_valid, complete_bins, valid]
+
+    @classmethod
+    def is_known(cls, key, range):
+
+        entry = cls.get_entry(key)
+
+        if entry is None:
             return False
 
-        if not range in ValidRangeCache.Paths[path]:
+        if not range in entry['ranges']:
             return False
 
         return True
 
     @classmethod
-    def is_valid(cls, path, range):
-        return ValidRangeCache.Paths[path][range]
+    def get(cls, key, range):
+
+        trial_valid, complete_bins, valid = cls.get_entry(key)['ranges'][range]
+
+        return trial_valid, complete_bins, valid
+
+    @classmethod
+    def is_valid(cls, key, range):
+        return cls.get(key, range)[2]
+
+    @classmethod
+    def save(cls, key):
+
+        if not ValidRangeCache.Enabled:
+            return
+
+        entry = cls.get_entry(key)
+        path = cls.entry_path(key)
+        temporary_path = None
+
+        try:
+
+            if not os.path.isdir(ValidRangeCache.Folder):
+                os.makedirs(ValidRangeCache.Folder)
+
+            handle, temporary_path = tempfile.mkstemp(suffix='.tmp', dir=ValidRangeCache.Folder)
+
+            with os.fdopen(handle, 'w') as f:
+                json.dump(entry, f)
+
+            replace_file(temporary_path, path)
+
+        except (IOError, OSError) as e:
+
+            Status.add("Cannot write valid range cache entry {0}: {1}".format(path, e), verbosity=2)
+
+            if temporary_path is not None and os.path.isfile(temporary_path):
+                os.remove(temporary_path)
+
+            return
+
+        cls.remove_stale(key)
+
+    @classmethod
+    def remove_stale(cls, key):
+
+        # entries saved for an earlier version of the same dataset
+
+        dataset_path = cls.get_entry(key)['path']
+
+        for file_name in os.listdir(ValidRangeCache.Folder):
+
+            stale_path = os.path.join(ValidRangeCache.Folder, file_name)
+
+            if not file_name.endswith(ValidRangeCache.Extension) or stale_path == cls.entry_path(key):
+                continue
+
+            stale_entry = cls.read(stale_path)
+
+            if stale_entry is not None and stale_entry['path'] == dataset_path:
+
+                try:
+                    os.remove(stale_path)
+                except OSError as e:
+                    Status.add("Cannot remove valid range cache entry {0}: {1}".format(stale_path, e), verbosity=2)
 
 
 class ShareDataset(Dataset):
@@ -73,6 +201,11 @@ class ShareDataset(Dataset):
 class ShareAnalysisBase(Analysis):
 
     MINIMUM_COMPLETE_BINS = 10
+    HASH_CHUNK_SIZE = 1024 ** 2
+
+    # threads used for the inner range trials; the trials are dominated by the
+    # (GIL bound) zero turbulence solve, so they run one at a time by default
+    INNER_RANGE_WORKERS = 1
 
     pcwg_inner_ranges = {'A': {'LTI': 0.08, 'UTI': 0.12, 'LSh': 0.05, 'USh': 0.25},
                          'B': {'LTI': 0.05, 'UTI': 0.09, 'LSh': 0.05, 'USh': 0.25},
@@ -96,18 +229,20 @@ class ShareAnalysisBase(Analysis):
         Analysis.calculate_analysis(self)
         self.pcwg_share_metrics_calc()
 
-    def hash_file_contents(self, file_path):
-
-        with open(file_path, 'r') as f:
-            uid = hashlib.sha1(''.join(f.read().split())).hexdigest()
+    @classmethod
+    def hash_file_contents(cls, file_path):
 
-        return uid
+        # whitespace-insensitive SHA-1
+        return FileDigests.digest(file_path, ShareAnalysisBase.HASH_CHUNK_SIZE, ignore_whitespace=True)
 
     def generate_unique_ids(self, dataset_config):
 
         self.dataset_configuration_unique_id = self.hash_file_contents(dataset_config.path)
         self.dataset_time_series_unique_id = self.hash_file_contents(dataset_config.input_time_series.absolute_path)
 
+        self.valid_range_key = ValidRangeCache.key(self.dataset_configuration_unique_id,
+                                                   self.dataset_time_series_unique_id)
+
     def calculate_measured_turbulence_power(self):
         pass
 
@@ -128,7 +263,7 @@ class ShareAnalysisBase(Analysis):
 
         self.outerMeasuredPowerCurve = None
 
-        inner_range_id, power_curve = self.calculate_best_inner_range()
+        inner_range_id = self.calculate_best_inner_range()
 
         self.set_inner_range(inner_range_id)
 
@@ -143,43 +278,47 @@ class ShareAnalysisBase(Analysis):
         
         max_complete_bins = 0
         max_complete_range_id = None
-        max_complete_power_curve = None
 
-        for inner_range_id in sorted(self.get_inner_ranges()):
-            
-            power_curve, success, complete_bins = self.attempt_power_curve_calculation(inner_range_id)
+        inner_range_ids = sorted(self.get_inner_ranges())
 
-            ValidRangeCache.register(self.path, inner_range_id, success)
+        trials = self.get_known_inner_range_trials(inner_range_ids)
 
-            if success:
+        untried_range_ids = [inner_range_id for inner_range_id in inner_range_ids if inner_range_id not in trials]
 
-                try:
+        if len(untried_range_ids) > 0:
 
-                    # ensure zero ti curve can be calculated
-                    Status.add("Calculating zero turbulence curve for Inner Range {0}"
-                               .format(inner_range_id), verbosity=3)
+            calculated_trials = self.calculate_inner_range_trials(untried_range_ids)
 
-                    power_curve.zero_ti_pc_required = True
-                    _ = power_curve.zeroTurbulencePowerCurve
+            registered = False
 
-                except ExceptionHandler.ExceptionType as e:
+            for inner_range_id, (power_curve, trial_success, complete_bins, success, conclusive) in zip(untried_range_ids, calculated_trials):
 
-                    Status.add("Could not calculate zero TI curve for Inner range {0}: {1}".format(inner_range_id, e))
+                # trials which failed with an error are tried again on the next run
+                if conclusive:
 
-                    for i in range(len(power_curve.wind_speed_points)):
+                    ValidRangeCache.register(self.valid_range_key,
+                                             self.path,
+                                             self.get_inner_range_trial_key(inner_range_id),
+                                             trial_success,
+                                             complete_bins,
+                                             success)
 
-                        Status.add("{0}\t{1}".format(power_curve.wind_speed_points[i],
-                                   power_curve.power_points[i]),
-                                   verbosity=3)
+                    registered = True
 
-                    success = False
+                trials[inner_range_id] = (trial_success, complete_bins, success)
+
+            if registered:
+                ValidRangeCache.save(self.valid_range_key)
+
+        for inner_range_id in inner_range_ids:
+
+            trial_success, complete_bins, success = trials[inner_range_id]
 
             if success:
 
                 if successes == 0 or complete_bins > max_complete_bins:
                     max_complete_bins = complete_bins
                     max_complete_range_id = inner_range_id
-                    max_complete_power_curve = power_curve
 
                 successes += 1
 
@@ -195,7 +334,111 @@ class ShareAnalysisBase(Analysis):
             Status.add("Inner Range {0} Selected with {1} complete bins."
                        .format(max_complete_range_id, max_complete_bins))
 
-            return max_complete_range_id, max_complete_power_curve
+            return max_complete_range_id
+
+    def get_known_inner_range_trials(self, inner_range_ids):
+
+        trials = {}
+
+        for inner_range_id in inner_range_ids:
+
+            trial_key = self.get_inner_range_trial_key(inner_range_id)
+
+            if ValidRangeCache.is_known(self.valid_range_key, trial_key):
+
+                trials[inner_range_id] = ValidRangeCache.get(self.valid_range_key, trial_key)
+
+                Status.add("Inner Range {0} known from a previous run ({1} complete bins, {2})."
+                           .format(inner_range_id,
+                                   trials[inner_range_id][1],
+                                   'valid' if trials[inner_range_id][2] else 'invalid'))
+
+        return trials
+
+    def get_inner_range_trial_key(self, inner_range_id):
+
+        # everything a trial depends on besides the dataset itself
+
+        dimensions = [(dimension.parameter, dimension.lower_limit, dimension.upper_limit)
+                      for dimension in self.get_inner_range_dimensions(inner_range_id)]
+
+        return repr((inner_range_id,
+                     dimensions,
+                     self.baseline.wind_speed_column,
+                     self.powerCurveMinimumCount,
+                     self.powerCurveExtrapolationMode,
+                     ShareAnalysisBase.MINIMUM_COMPLETE_BINS,
+                     ver.version))
+
+    def calculate_inner_range_trials(self, inner_range_ids):
+
+        # the trials only read the data frame, so they run concurrently;
+        # their status messages are replayed in inner range order
+
+        workers = min(ShareAnalysisBase.INNER_RANGE_WORKERS, len(inner_range_ids))
+
+        if workers < 2:
+            return [self.calculate_inner_range_trial(inner_range_id) for inner_range_id in inner_range_ids]
+
+        pool = ThreadPool(workers)
+
+        try:
+            captured_trials = pool.map(self.capture_inner_range_trial, inner_range_ids)
+        finally:
+            pool.close()
+            pool.join()
+
+        trials = []
+
+        for messages, trial in captured_trials:
+            Status.replay(messages)
+            trials.append(trial)
+
+        return trials
+
+    def capture_inner_range_trial(self, inner_range_id):
+
+        Status.start_capture()
+
+        try:
+            trial = self.calculate_inner_range_trial(inner_range_id)
+        finally:
+            messages = Status.end_capture()
+
+        return messages, trial
+
+    def calculate_inner_range_trial(self, inner_range_id):
+
+        # conclusive unless the trial failed with an error (rather than on its complete bins)
+        power_curve, trial_success, complete_bins, conclusive = self.attempt_power_curve_calculation(inner_range_id)
+
+        success = trial_success
+
+        if success:
+
+            try:
+
+                # ensure zero ti curve can be calculated
+                Status.add("Calculating zero turbulence curve for Inner Range {0}"
+                           .format(inner_range_id), verbosity=3)
+
+                power_curve.zero_ti_pc_required = True
+                _ = power_curve.zeroTurbulencePowerCurve
+
+            except ExceptionHandler.ExceptionType as e:
+
+                Status.add("Could not calculate zero TI curve for Inner range {0}: {1}".format(inner_range_id, e))
+
+                for i in range(len(power_curve.wind_speed_points)):
+
+                    Status.add("{0}\t{1}".format(power_curve.wind_speed_points[i],
+                               power_curve.power_points[i]),
+                               verbosity=3)
+
+                success = False
+                conclusive = False
+
+        return power_curve, trial_success, complete_bins, success, conclusive
 
     def attempt_power_curve_calculation(self, inner_range_id):
 
@@ -203,11 +446,10 @@ class ShareAnalysisBase(Analysis):
 
         try:
 
-            self.set_inner_range(inner_range_id)
-
             # use linear interpolation mode in trial calculation for speed
             power_curve = self.calculate_inner_measured_power_curve(supress_zero_turbulence_curve_creation=True,
-                                                                    override_interpolation_method='Linear')
+                                                                    override_interpolation_method='Linear',
+                                                                    inner_range_dimensions=self.get_inner_range_dimensions(inner_range_id))
 
             complete_bins = self.get_complete_bins(power_curve)
 
@@ -217,19 +459,19 @@ class ShareAnalysisBase(Analysis):
                            " using Inner Range definition {0} ({1} complete bins)."
                            .format(inner_range_id, complete_bins))
 
-                return None, False, complete_bins
+                return None, False, complete_bins, True
             
             Status.add("Power Curve success using Inner Range definition {0} ({1} complete bins)."
                        .format(inner_range_id, complete_bins))
 
-            return power_curve, True, complete_bins
+            return power_curve, True, complete_bins, True
         
         except ExceptionHandler.ExceptionType as e:
 
             Status.add(str(e), red=True)
 
             Status.add("Power Curve failed using Inner Range definition %s." % inner_range_id, red=True)
-            return None, False, 0
+            return None, False, 0, False
 
     def get_complete_bins(self, power_curve):
         if power_curve is None:
@@ -259,7 +501,9 @@ class ShareAnalysisBase(Analysis):
     def set_inner_range(self, inner_range_id):
 
         self.inner_range_id = inner_range_id
-        self.inner_range_dimensions = []
+        self.inner_range_dimensions = self.get_inner_range_dimensions(inner_range_id)
+
+    def get_inner_range_dimensions(self, inner_range_id):
 
         lower_shear = ShareAnalysisBase.pcwg_inner_ranges[inner_range_id]['LSh']
         upper_shear = ShareAnalysisBase.pcwg_inner_ranges[inner_range_id]['USh']
@@ -267,8 +511,8 @@ class ShareAnalysisBase(Analysis):
         lower_turbulence = ShareAnalysisBase.pcwg_inner_ranges[inner_range_id]['LTI']
         upper_turbulence = ShareAnalysisBase.pcwg_inner_ranges[inner_range_id]['UTI']
 
-        self.inner_range_dimensions.append(InnerRangeDimension("Shear", lower_shear, upper_shear))
-        self.inner_range_dimensions.append(InnerRangeDimension("Turbulence", lower_turbulence, upper_turbulence))
+        return [InnerRangeDimension("Shear", lower_shear, upper_shear),
+                InnerRangeDimension("Turbulence", lower_turbulence, upper_turbulence)]
 
     def apply_settings(self, config):
 
@@ -327,12 +571,12 @@ class ShareAnalysisBase(Analysis):
         norm_wind_speed_step = 0.1
 
         self.normalisedWindSpeedBins = Bins(first_norm_wind_speed_bin, norm_wind_speed_step, last_norm_wind_speed_bin)
-        self.dataFrame[self.normalisedWSBin] = (self.dataFrame[self.normalisedWS]).map(self.normalisedWindSpeedBins.binCenter)
+        self.dataFrame[self.normalisedWSBin] = self.normalisedWindSpeedBins.binCenters(self.dataFrame[self.normalisedWS])
 
         if self.hasDirection:
             self.pcwgDirectionBin = 'Wind Direction Bin Centre'
             self.pcwgWindDirBins = DirectionBins(36)
-            self.dataFrame[self.pcwgDirectionBin] = (self.dataFrame[self.windDirection]).map(self.pcwgWindDirBins.binCenter)
+            self.dataFrame[self.pcwgDirectionBin] = self.pcwgWindDirBins.binCenters(self.dataFrame[self.windDirection])
 
         self.pcwgFourCellMatrixGroup = 'PCWG Four Cell WS-TI Matrix Group'
 
@@ -562,13 +806,217 @@ class PcwgShareX(object):
         return rpt 
 
 
+class PcwgShareXWorker(PcwgShareX):
+
+    # calculates a dataset for a portfolio run: the report is written to
+    # output_folder rather than straight to the output zip
+
+    def __init__(self, dataset, output_folder, share_factory):
+
+        self.output_folder = output_folder
+        self.report_path = None
+
+        PcwgShareX.__init__(self, dataset, output_zip=None, share_factory=share_factory)
+
+    def export_report(self, output_zip):
+
+        try:
+
+            report_path = os.path.join(self.output_folder,
+                                       "{0}.xls".format(self.analysis.dataset_configuration_unique_id))
+
+            Status.add("Exporting results to {0}".format(os.path.basename(report_path)))
+            self.pcwg_data_share_report(output_file_name=report_path)
+            Status.add("Report written to {0}".format(os.path.basename(report_path)))
+
+            self.report_path = report_path
+
+        except ExceptionHandler.ExceptionType as e:
+
+            Status.add("ERROR Exporting Report: %s" % e, red=True)
+
+
+class ShareCorrectionSummary(object):
+
+    def __init__(self, correction):
+        self.short_correction_name = correction.short_correction_name
+
+
+class ShareAnalysisSummary(object):
+
+    # the parts of a share analysis used by the portfolio report,
+    # small enough to be returned from a worker process or stored
+
+    def __init__(self, analysis):
+
+        self.dataset_configuration_unique_id = analysis.dataset_configuration_unique_id
+        self.dataset_time_series_unique_id = analysis.dataset_time_series_unique_id
+
+        self.corrections = {}
+
+        for correction_name in analysis.corrections:
+            self.corrections[correction_name] = ShareCorrectionSummary(analysis.corrections[correction_name])
+
+        self.normalisedWSBin = analysis.normalisedWSBin
+        self.normalisedWindSpeedBins = analysis.normalisedWindSpeedBins
+        self.pcwgRange = analysis.pcwgRange
+        self.pcwgFourCellMatrixGroup = analysis.pcwgFourCellMatrixGroup
+        self.binned_pcwg_err_metrics = analysis.binned_pcwg_err_metrics
+
+
+class ShareXResult(object):
+
+    # a dataset's contribution to a portfolio run: its report and summary
+
+    def __init__(self, share):
+
+        self.success = share.success
+
+        if share.report_path is not None:
+
+            self.report_name = os.path.basename(share.report_path)
+
+            with open(share.report_path, 'rb') as f:
+                self.report_data = f.read()
+
+        else:
+
+            self.report_name = None
+            self.report_data = None
+
+        if share.success:
+            self.analysis = ShareAnalysisSummary(share.analysis)
+        else:
+            self.analysis = None
+
+
+class ShareResultCache(object):
+
+    # Share results of previous portfolio runs, one folder per portfolio and share.
+    # Entries are keyed on the dataset configuration and time series hashes, the
+    # tool version and the share name, so edited datasets are recalculated.
+
+    Folder = os.path.join(tempfile.gettempdir(), 'pcwg_share_result_cache')
+    Extension = '.pickle'
+
+    @classmethod
+    def key(cls, configuration_id, time_series_id, share_name):
+        return hashlib.sha1(repr((configuration_id, time_series_id, ver.version, share_name, MarmanderPowerCurveInterpolatorBase.Solver))).hexdigest()
+
+    @classmethod
+    def portfolio_folder(cls, portfolio_path, share_name):
+        portfolio_id = hashlib.sha1(repr((os.path.abspath(portfolio_path), share_name))).hexdigest()
+        return os.path.join(cls.Folder, portfolio_id)
+
+    @classmethod
+    def entry_path(cls, folder, key):
+        return os.path.join(folder, key + cls.Extension)
+
+    @classmethod
+    def load(cls, folder, key):
+
+        path = cls.entry_path(folder, key)
+
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                return cPickle.load(f)
+        except Exception as e:
+            Status.add("Cannot read stored share result {0}: {1}".format(path, e), verbosity=2)
+            return None
+
+    @classmethod
+    def store(cls, folder, key, result):
+
+        path = cls.entry_path(folder, key)
+        temporary_path = path + '.tmp'
+
+        try:
+
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+
+            with open(temporary_path, 'wb') as f:
+                cPickle.dump(result, f, cPickle.HIGHEST_PROTOCOL)
+
+            replace_file(temporary_path, path)
+
+        except Exception as e:
+
+            Status.add("Cannot store share result {0}: {1}".format(path, e), verbosity=2)
+
+            if os.path.isfile(temporary_path):
+                os.remove(temporary_path)
+
+    @classmethod
+    def remove_unused(cls, folder, keys):
+
+        # results of datasets which have since been edited or removed from the portfolio
+
+        if not os.path.isdir(folder):
+            return
+
+        for file_name in os.listdir(folder):
+
+            if file_name.endswith(cls.Extension) and file_name[:-len(cls.Extension)] not in keys:
+
+                try:
+                    os.remove(os.path.join(folder, file_name))
+                except OSError as e:
+                    Status.add("Cannot remove stored share result {0}: {1}".format(file_name, e), verbosity=2)
+
+
+def initialize_portfolio_worker(messages, verbosity):
+
+    # status messages raised in a worker process are queued for the parent to forward
+
+    def add_message(message, red, orange, verbosity):
+        messages.put(('status', (message, red, orange)))
+
+    def set_portfolio_status(completed, total, finished):
+        messages.put(('portfolio', (completed, total, finished)))
+
+    Status.initialize_status(add_message, set_portfolio_status, verbosity)
+
+
+def calculate_portfolio_dataset(path, share_factory):
+
+    output_folder = tempfile.mkdtemp()
+
+    try:
+        dataset = DatasetConfiguration(path)
+        share = PcwgShareXWorker(dataset, output_folder=output_folder, share_factory=share_factory)
+        return ShareXResult(share)
+    finally:
+        rmtree(output_folder, ignore_errors=True)
+
+
 class ShareXPortfolio(object):
-    
-    def __init__(self, portfolio_configuration, share_factory):
+
+    # number of worker processes used to calculate datasets (1 calculates in this process)
+    Workers = 1
+    WorkerPollInterval = 0.1
+
+    # reuse the stored results of datasets unchanged since the last run
+    Incremental = False
+
+    def __init__(self, portfolio_configuration, share_factory, workers=None, incremental=None):
 
         self.share_name = share_factory.share_name
         self.share_factory = share_factory
 
+        if workers is None:
+            self.workers = self.Workers
+        else:
+            self.workers = workers
+
+        if incremental is None:
+            self.incremental = self.Incremental
+        else:
+            self.incremental = incremental
+
         Status.add("Running Portfolio: {0}".format(self.share_name))
         
         self.portfolio_path = portfolio_configuration.path
@@ -578,6 +1026,8 @@ class ShareXPortfolio(object):
 
         self.portfolio = portfolio_configuration
 
+        self.results_folder = ShareResultCache.portfolio_folder(self.portfolio_path, self.share_name)
+
         self.calculate()
 
     def output_paths_status(self, zip_file, summary_file):
@@ -615,7 +1065,10 @@ class ShareXPortfolio(object):
 
         with zipfile.ZipFile(zip_file, 'w') as output_zip:
 
-            successful = self.calculate_all_datasets(active_datasets, output_zip)
+            if self.workers > 1 or self.incremental:
+                successful = self.calculate_all_dataset_results(active_datasets, output_zip)
+            else:
+                successful = self.calculate_all_datasets(active_datasets, output_zip)
 
             self.report_summary(summary_file, output_zip)
 
@@ -630,6 +1083,22 @@ class ShareXPortfolio(object):
 
         Status.add(time_message)
 
+    def load_verified_dataset(self, index, item):
+
+        Status.add("Loading dataset {0}".format(index + 1))
+        dataset = DatasetConfiguration(item.absolute_path)
+        Status.add("Dataset {0} loaded = ".format(index + 1, dataset.name))
+
+        Status.add("Verifying dataset {0}".format(dataset.name))
+
+        if not self.verify_share_configs(dataset):
+            Status.add("Dataset Verification Failed for {0}".format(dataset.name), red=True)
+            return None
+
+        Status.add("Dataset {0} Verified".format(dataset.name))
+
+        return dataset
+
     def calculate_all_datasets(self, active_datasets, output_zip):
 
         successful = 0
@@ -638,29 +1107,166 @@ class ShareXPortfolio(object):
 
             Status.set_portfolio_status(index + 1, len(active_datasets), False)
 
-            Status.add("Loading dataset {0}".format(index + 1))
-            dataset = DatasetConfiguration(item.absolute_path)
-            Status.add("Dataset {0} loaded = ".format(index + 1, dataset.name))
+            dataset = self.load_verified_dataset(index, item)
 
-            Status.add("Verifying dataset {0}".format(dataset.name))
+            if dataset is not None:
 
-            if not self.verify_share_configs(dataset):
+                Status.add("Running: {0}".format(dataset.name))
 
-                Status.add("Dataset Verification Failed for {0}".format(dataset.name), red=True)
+                if self.calculate_dataset(dataset, output_zip):
+                    successful += 1
 
-            else:
+        return successful
 
-                Status.add("Dataset {0} Verified".format(dataset.name))
+    def calculate_all_dataset_results(self, active_datasets, output_zip):
 
-                Status.add("Running: {0}".format(dataset.name))
+        # datasets are calculated as results (in worker processes if there is
+        # more than one worker) and, in incremental mode, reused from earlier runs;
+        # results are collected in portfolio order so the zip and summary match a serial run
 
-                if self.calculate_dataset(dataset, output_zip):
+        datasets = []
+
+        for index, item in enumerate(active_datasets):
+
+            dataset = self.load_verified_dataset(index, item)
+
+            if dataset is not None:
+                datasets.append((index, item.absolute_path, dataset.name, self.get_result_key(dataset)))
+
+        stored_results = {}
+
+        if self.incremental:
+
+            for index, path, name, key in datasets:
+
+                result = ShareResultCache.load(self.results_folder, key)
+
+                if result is not None:
+                    Status.add("Using stored results for {0}".format(name))
+                    stored_results[index] = result
+
+        calculations = [dataset for dataset in datasets if dataset[0] not in stored_results]
+
+        pool = None
+        pending = {}
+
+        workers = min(self.workers, len(calculations))
+
+        if workers > 1:
+
+            Status.add("Running {0} datasets in {1} worker processes".format(len(calculations), workers))
+
+            manager = multiprocessing.Manager()
+            messages = manager.Queue()
+
+            pool = multiprocessing.Pool(workers,
+                                        initializer=initialize_portfolio_worker,
+                                        initargs=(messages, Status.get().verbosity))
+
+        successful = 0
+
+        try:
+
+            if pool is not None:
+
+                for index, path, name, key in calculations:
+                    Status.add("Running: {0}".format(name))
+                    pending[index] = pool.apply_async(self.dataset_calculation(), (path, self.share_factory))
+
+                pool.close()
+
+            for index, path, name, key in datasets:
+
+                if index in stored_results:
+
+                    result = stored_results[index]
+
+                else:
+
+                    if index in pending:
+                        result = self.get_worker_result(name, pending[index], messages)
+                    else:
+                        Status.add("Running: {0}".format(name))
+                        result = self.dataset_calculation()(path, self.share_factory)
+
+                    if self.incremental and self.is_reusable(result):
+                        ShareResultCache.store(self.results_folder, key, result)
+
+                Status.set_portfolio_status(index + 1, len(active_datasets), False)
+
+                if self.add_result(result, output_zip):
                     successful += 1
 
+            if pool is not None:
+                pool.join()
+
+        finally:
+
+            if pool is not None:
+                pool.terminate()
+                manager.shutdown()
+
+        if self.incremental:
+            ShareResultCache.remove_unused(self.results_folder, [key for index, path, name, key in datasets])
+
         return successful
 
-        if len(self.shares) < 1:
-            Status.add("No successful results to summarise")
+    def dataset_calculation(self):
+        # module level, so that it can be run in a worker process
+        return calculate_portfolio_dataset
+
+    def is_reusable(self, result):
+        # failures (and reports which could not be exported) are retried on the next run
+        return result is not None and result.success and result.report_data is not None
+
+    def get_result_key(self, dataset):
+
+        configuration_id = ShareAnalysisBase.hash_file_contents(dataset.path)
+        time_series_id = ShareAnalysisBase.hash_file_contents(dataset.input_time_series.absolute_path)
+
+        return ShareResultCache.key(configuration_id, time_series_id, self.share_name)
+
+    def get_worker_result(self, name, result, messages):
+
+        while not result.ready():
+            self.forward_worker_messages(messages)
+            result.wait(self.WorkerPollInterval)
+
+        self.forward_worker_messages(messages)
+
+        try:
+            return result.get()
+        except ExceptionHandler.ExceptionType as e:
+            Status.add("ERROR Calculating PCWG-Share Analysis for {0}: {1}".format(name, e), red=True)
+            return None
+
+    def forward_worker_messages(self, messages):
+
+        while not messages.empty():
+
+            kind, arguments = messages.get()
+
+            if kind == 'status':
+                message, red, orange = arguments
+                Status.add(message, red=red, orange=orange)
+            else:
+                Status.set_portfolio_status(*arguments)
+
+    def add_result(self, result, output_zip):
+
+        if result is None:
+            return False
+
+        if result.report_data is not None:
+            Status.add("Adding {0} to output zip.".format(result.report_name))
+            output_zip.writestr(result.report_name, result.report_data)
+            Status.add("{0} added to output zip.".format(result.report_name))
+
+        if result.success:
+            self.shares.append(result)
+            return True
+        else:
+            return False
 
     def calculate_dataset(self, dataset, output_zip):
 
@@ -65,14 +65,16 @@ class ShareAnalysis3(ShareAnalysis2):
 
         self.powerCurve.revert_zero_ti()
 
-    def set_inner_range(self, inner_range_id):
+    def get_inner_range_dimensions(self, inner_range_id):
 
-        ShareAnalysis2.set_inner_range(self, inner_range_id)
+        inner_range_dimensions = ShareAnalysis2.get_inner_range_dimensions(self, inner_range_id)
 
         if ShareAnalysis3.INCLUDE_DENSITY_IN_INNER_RANGE:
 
             range_half_width = 0.5 * ShareAnalysis3.DENSITY_RANGE_WIDTH
 
-            self.inner_range_dimensions.append(InnerRangeDimension("Density",
-                                                                   Analysis.STANDARD_DENSITY - range_half_width,
-                                                                   Analysis.STANDARD_DENSITY + range_half_width))
+            inner_range_dimensions.append(InnerRangeDimension("Density",
+                                                              Analysis.STANDARD_DENSITY - range_half_width,
+                                                              Analysis.STANDARD_DENSITY + range_half_width))
+
+        return inner_range_dimensions
@@ -9,6 +9,7 @@ from ..core.analysis import Analysis
 from ..core.power_deviation_matrix import DeviationMatrixDefinition
 from ..configuration.power_deviation_matrix_configuration import PowerDeviationMatrixDimension
 from ..configuration.power_deviation_matrix_configuration import PowerDeviationMatrixConfiguration
+from ..configuration.dataset_configuration import DatasetConfiguration
 from ..reporting.share_matrix_report import ShareMatrixReport
 
 from ..core.status import Status
@@ -32,60 +33,68 @@ class CombinedMatrix(object):
         self.count_matrix = count_matrix
 
 
-class PostProcessMatrices(object):
+class MatrixPartial(object):
 
-    def __init__(self, results):
+    # A dataset's contribution to the combined matrices. The sums and counts merge
+    # associatively, so datasets can be reduced in any grouping (e.g. per worker).
 
-        self.results = results
+    def __init__(self, sum_of_deviations, count, sum_of_matrices, matrix_count):
 
-        average_of_matrices = None
-        average_of_deviations = None
+        self.sum_of_deviations = sum_of_deviations
+        self.count = count
+        self.sum_of_matrices = sum_of_matrices
+        self.matrix_count = matrix_count
 
-        total_average_of_deviations = None
-        total_average_of_matrices = None
+    @classmethod
+    def from_power_deviations(cls, power_deviations):
 
-        bins = None
+        deviation_matrix = power_deviations.deviation_matrix.fillna(0)
+        count_matrix = power_deviations.count_matrix.fillna(0)
 
-        for result in self.results:
+        mask = count_matrix < ShareAnalysisMatrix.MINIMUM_COUNT
+        count_matrix[mask] = 0
 
-            deviation_matrix = result.power_deviations.deviation_matrix.fillna(0)
-            count_matrix = result.power_deviations.count_matrix.fillna(0)
+        # each sufficiently populated cell counts once towards the average of matrices
+        matrix_count = count_matrix.copy()
+        matrix_count[~mask] = 1
 
-            mask = count_matrix < ShareAnalysisMatrix.MINIMUM_COUNT
-            count_matrix[mask] = 0
+        return cls(deviation_matrix * count_matrix,
+                   count_matrix,
+                   deviation_matrix * matrix_count,
+                   matrix_count)
 
-            count_matrix_average_of_matrices = count_matrix.copy()
-            count_matrix_average_of_matrices[~mask] = 1
+    def merge(self, other):
 
-            if bins is None:
+        return MatrixPartial(self.sum_of_deviations.add(other.sum_of_deviations, fill_value=0.0),
+                             self.count.add(other.count, fill_value=0.0),
+                             self.sum_of_matrices.add(other.sum_of_matrices, fill_value=0.0),
+                             self.matrix_count.add(other.matrix_count, fill_value=0.0))
 
-                average_of_deviations = deviation_matrix * count_matrix
-                average_of_matrices = deviation_matrix
-                total_average_of_deviations = count_matrix
-                total_average_of_matrices = count_matrix_average_of_matrices
-                bins = result.bins
 
-            else:
+class PostProcessMatrices(object):
 
-                average_of_deviations = average_of_deviations.add(deviation_matrix * count_matrix,
-                                                                  fill_value=0.0)
+    def __init__(self, results):
+
+        self.results = results
 
-                average_of_matrices = average_of_matrices.add(deviation_matrix * count_matrix_average_of_matrices,
-                                                              fill_value=0.0)
+        partial = None
+        bins = None
 
-                total_average_of_deviations = total_average_of_deviations.add(count_matrix,
-                                                                              fill_value=0.0)
+        for result in self.results:
 
-                total_average_of_matrices = total_average_of_matrices.add(count_matrix_average_of_matrices,
-                                                                          fill_value=0.0)
+            if partial is None:
+                partial = result.partial
+                bins = result.bins
+            else:
+                partial = partial.merge(result.partial)
 
-        if bins is not None:
+        if partial is not None:
 
-            average_of_matrices /= total_average_of_matrices
-            average_of_deviations /= total_average_of_deviations
+            average_of_matrices = partial.sum_of_matrices / partial.matrix_count
+            average_of_deviations = partial.sum_of_deviations / partial.count
 
-            total_average_of_matrices = total_average_of_matrices.dropna()
-            total_average_of_deviations = total_average_of_deviations.dropna()
+            total_average_of_matrices = partial.matrix_count.dropna()
+            total_average_of_deviations = partial.count.dropna()
             average_of_matrices = average_of_matrices.dropna()
             average_of_deviations = average_of_deviations.dropna()
 
@@ -108,6 +117,7 @@ class ShareMatrixResults(object):
     def __init__(self, deviations, bins):
         self.power_deviations = deviations
         self.bins = bins
+        self.partial = MatrixPartial.from_power_deviations(deviations)
 
 class ShareMatrixInfo(object):
 
@@ -115,20 +125,84 @@ class ShareMatrixInfo(object):
         self.interpolation_mode = share.analysis.interpolationMode
         self.inner_range = share.analysis.matrix_inner_range
 
+
+class ShareMatrixDatasetResult(object):
+
+    # a dataset's matrices for each inner range, small enough to be
+    # returned from a worker process or stored
+
+    def __init__(self, infos, results_2D, results_3D):
+
+        self.infos = infos
+        self.results_2D = results_2D
+        self.results_3D = results_3D
+
+        self.success = (len(self.infos) > 0)
+
+
+def calculate_matrix_ranges(share):
+
+    infos = {}
+    results_2D = {}
+    results_3D = {}
+
+    if share.analysis is not None:
+
+        for inner_range in sorted(ShareAnalysisBase.pcwg_inner_ranges):
+
+            Status.add('Calculating matrix for inner range {0}'.format(inner_range))
+
+            share.calculate_for_range(inner_range)
+
+            if share.success:
+
+                infos[inner_range] = ShareMatrixInfo(share)
+
+                results_2D[inner_range] = ShareMatrixResults(share.analysis.baseline_power_deviations,
+                                                             share.analysis.calculated_power_deviation_matrix_definition.bins)
+
+                results_3D[inner_range] = ShareMatrixResults(share.analysis.baseline_power_deviations_3D,
+                                                             share.analysis.calculated_power_deviation_matrix_definition_3D.bins)
+
+    return ShareMatrixDatasetResult(infos, results_2D, results_3D)
+
+
+def calculate_matrix_dataset(path, share_factory):
+
+    dataset = DatasetConfiguration(path)
+    share = PcwgShareMatrix(dataset, output_zip=None)
+
+    return calculate_matrix_ranges(share)
+
+
 class ShareMatrix(ShareXPortfolio):
 
-    def __init__(self, portfolio_configuration):
+    def __init__(self, portfolio_configuration, workers=None, incremental=None):
 
         self.results_by_range_2D = {}
         self.results_by_range_3D = {}
         self.infos_by_range = {}
 
-        ShareXPortfolio.__init__(self, portfolio_configuration, share_factory=ShareMatrixAnalysisFactory())
+        ShareXPortfolio.__init__(self,
+                                 portfolio_configuration,
+                                 share_factory=ShareMatrixAnalysisFactory(),
+                                 workers=workers,
+                                 incremental=incremental)
 
     def calculate_dataset(self, dataset, output_zip):
 
         share = PcwgShareMatrix(dataset, output_zip=output_zip)
-        success = False
+
+        return self.add_result(calculate_matrix_ranges(share), output_zip)
+
+    def dataset_calculation(self):
+        return calculate_matrix_dataset
+
+    def is_reusable(self, result):
+        # matrix results carry no report
+        return result is not None and result.success
+
+    def add_result(self, result, output_zip):
 
         for inner_range in sorted(ShareAnalysisBase.pcwg_inner_ranges):
 
@@ -137,25 +211,12 @@ class ShareMatrix(ShareXPortfolio):
                 self.results_by_range_2D[inner_range] = []
                 self.results_by_range_3D[inner_range] = []
 
-            Status.add('Calculating matrix for inner range {0}'.format(inner_range))
+            if result is not None and inner_range in result.infos:
+                self.infos_by_range[inner_range].append(result.infos[inner_range])
+                self.results_by_range_2D[inner_range].append(result.results_2D[inner_range])
+                self.results_by_range_3D[inner_range].append(result.results_3D[inner_range])
 
-            share.calculate_for_range(inner_range)
-
-            if share.success:
-
-                results_2D = ShareMatrixResults(share.analysis.baseline_power_deviations,
-                                                share.analysis.calculated_power_deviation_matrix_definition.bins)
-
-                results_3D = ShareMatrixResults(share.analysis.baseline_power_deviations_3D,
-                                                share.analysis.calculated_power_deviation_matrix_definition_3D.bins)
-
-                self.infos_by_range[inner_range].append(ShareMatrixInfo(share))
-                self.results_by_range_2D[inner_range].append(results_2D)
-                self.results_by_range_3D[inner_range].append(results_3D)
-
-                success = True
-
-        return success
+        return (result is not None and result.success)
 
     def output_paths_status(self, zip_file, summary_file):
         Status.add("Matrix results will be stored in: {0}".format(summary_file))
@@ -281,6 +342,7 @@ class ShareAnalysisMatrix(ShareAnalysisBase):
         self.success = False
 
         self.matrix_inner_range = None
+        self.prepared_data_frame = None
 
         ShareAnalysisBase.__init__(self, dataset)
 
@@ -293,12 +355,28 @@ class ShareAnalysisMatrix(ShareAnalysisBase):
         pass
 
     def calculate_analysis(self):
-        pass
+
+        # range independent stages are calculated once per dataset,
+        # each inner range then starts from a copy of the prepared data
+
+        try:
+            self.prepare_data()
+            self.prepared_data_frame = self.dataFrame
+        except ExceptionHandler.ExceptionType as e:
+            Status.add("Could not prepare Share Matrix data: {0}".format(e), red=True)
+            self.prepared_data_frame = None
 
     def calculate_for_range(self, inner_range):
+
+        if self.prepared_data_frame is None:
+            self.success = False
+            return
+
         try:
             self.matrix_inner_range = inner_range
-            ShareAnalysisBase.calculate_analysis(self)
+            self.dataFrame = self.prepared_data_frame.copy()
+            self.calculate_results()
+            self.pcwg_share_metrics_calc()
             self.success = True
         except ExceptionHandler.ExceptionType as e:
             self.success = False
@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+
+from pcwg.core.dataset_cache import DatasetCache
+from pcwg.share.share import ShareResultCache
+from pcwg.share.share import ValidRangeCache
+
+# the on-disk caches are kept in a temporary folder for the whole suite, so that
+# tests neither read results left by earlier runs nor leave entries behind
+
+cache_folder = None
+dataset_cache_folder = None
+valid_range_cache_folder = None
+share_result_cache_folder = None
+
+
+def setup_package():
+
+    global cache_folder, dataset_cache_folder, valid_range_cache_folder, share_result_cache_folder
+
+    cache_folder = tempfile.mkdtemp()
+
+    dataset_cache_folder = DatasetCache.Folder
+    DatasetCache.Folder = cache_folder
+
+    valid_range_cache_folder = ValidRangeCache.Folder
+    ValidRangeCache.Folder = os.path.join(cache_folder, 'valid_ranges')
+    ValidRangeCache.Entries = None
+
+    share_result_cache_folder = ShareResultCache.Folder
+    ShareResultCache.Folder = os.path.join(cache_folder, 'share_results')
+
+
+def teardown_package():
+
+    DatasetCache.Folder = dataset_cache_folder
+
+    ValidRangeCache.Folder = valid_range_cache_folder
+    ValidRangeCache.Entries = None
+
+    ShareResultCache.Folder = share_result_cache_folder
+
+    shutil.rmtree(cache_folder)
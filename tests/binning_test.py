@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from pcwg.core.binning import Bins, DirectionBins
+
+
+class TestBinCenters(unittest.TestCase):
+
+    def check_bins(self, bins, values):
+
+        expected = [bins.binCenter(value) for value in values]
+        actual = bins.binCenters(pd.Series(values))
+
+        np.testing.assert_array_equal(actual.values, expected)
+
+    def test_wind_speed_bins(self):
+
+        bins = Bins(1.0, 1.0, 30.0)
+
+        values = np.concatenate([np.linspace(-2.0, 33.0, 3501),
+                                 np.array(bins.starts.keys()),
+                                 np.array([end for (start, end) in bins.limits]),
+                                 [np.nan, 30.5, 30.5 - 1e-10]])
+
+        self.check_bins(bins, values)
+
+    def test_fractional_bins(self):
+
+        bins = Bins(0.05, 0.1, 2.95)
+
+        self.check_bins(bins, np.concatenate([np.linspace(-0.3, 3.3, 3601), [np.nan]]))
+
+    def test_direction_bins(self):
+
+        bins = DirectionBins(36)
+
+        self.check_bins(bins, np.concatenate([np.linspace(-20.0, 380.0, 4001), [np.nan, 355.0, 5.0]]))
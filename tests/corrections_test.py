@@ -0,0 +1,26 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from pcwg.core import corrections
+
+
+class TestDensityEquivalentWindSpeed(unittest.TestCase):
+
+    def test_wind_speeds_match_row_calculation(self):
+
+        random = np.random.RandomState(0)
+
+        data_frame = pd.DataFrame({'Hub Wind Speed': random.uniform(0.0, 25.0, 300),
+                                   'Hub Density': random.uniform(1.0, 1.4, 300)})
+
+        data_frame.loc[::13, 'Hub Density'] = np.nan
+
+        source = corrections.Source('Hub Wind Speed')
+
+        correction = corrections.DensityEquivalentWindSpeed(data_frame, source, 1.225, 'Hub Density')
+
+        expected = data_frame.apply(correction.calculator.densityCorrectedHubWindSpeed, axis=1)
+
+        np.testing.assert_allclose(data_frame[correction.wind_speed_column].values, expected.values, rtol=1e-14)
+        self.assertIsNone(correction.power_column)
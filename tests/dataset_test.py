@@ -0,0 +1,293 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from os.path import join, dirname, realpath
+
+from pcwg.configuration.base_configuration import Filter
+from pcwg.configuration.dataset_configuration import DatasetConfiguration, ShearMeasurement
+from pcwg.core.dataset import Dataset
+from pcwg.core.dataset import ShearExponentCalculator
+from pcwg.core.dataset import SiteCalibrationCalculator
+from pcwg.core.dataset_cache import DatasetCache
+from pcwg.core.dataset_cache import FileDigests
+
+import version as ver
+
+FILE_DIR = dirname(realpath(__file__))
+
+
+class TestShearExponentCalculator(unittest.TestCase):
+
+    def setUp(self):
+
+        random = np.random.RandomState(0)
+
+        self.measurements = [ShearMeasurement(40.0, 'Speed 40'),
+                             ShearMeasurement(60.0, 'Speed 60'),
+                             ShearMeasurement(80.0, 'Speed 80')]
+
+        self.data_frame = pd.DataFrame(random.uniform(2.0, 15.0, (200, 3)),
+                                       columns=['Speed 40', 'Speed 60', 'Speed 80'])
+
+        self.data_frame.iloc[::7, 0] = np.nan
+        self.data_frame.iloc[::11, 1] = np.nan
+        self.data_frame.iloc[::13, 2] = np.nan
+        self.data_frame.iloc[5, 1] = 0.0
+
+    def test_shear_exponents_match_row_calculation(self):
+
+        calculator = ShearExponentCalculator(self.measurements)
+
+        expected = self.data_frame.apply(calculator.shearExponent, axis=1)
+        actual = calculator.shearExponents(self.data_frame)
+
+        np.testing.assert_allclose(actual.values, expected.values, atol=1e-12)
+
+        # first row has no valid heights, sixth row has a zero wind speed
+        self.assertTrue(np.isnan(actual.values[0]))
+        self.assertTrue(np.isnan(actual.values[5]))
+
+    def test_single_height_rejected(self):
+
+        calculator = ShearExponentCalculator(self.measurements[:1])
+
+        self.assertRaises(Exception, calculator.shearExponents, self.data_frame)
+
+
+class TestSiteCalibrationCalculator(unittest.TestCase):
+
+    def setUp(self):
+
+        random = np.random.RandomState(0)
+
+        sectors = pd.DataFrame({'Slope': [1.01, 0.98, 1.05, 0.97],
+                                'Offset': [0.1, -0.2, 0.05, 0.0]},
+                               index=[0.0, 90.0, 180.0, 270.0])
+
+        actives = {0.0: True, 90.0: True, 180.0: False, 270.0: True}
+
+        self.calculator = SiteCalibrationCalculator('Direction Bin', 'Speed', sectors, actives=actives)
+
+        self.data_frame = pd.DataFrame({'Direction Bin': random.choice([0.0, 90.0, 180.0, 270.0, 45.0, np.nan], 300),
+                                        'Speed': random.uniform(2.0, 15.0, 300)})
+
+        self.data_frame.loc[::17, 'Speed'] = np.nan
+
+    def test_calibrate_dataframe_matches_turbine_value(self):
+
+        expected = self.data_frame.apply(self.calculator.turbineValue, axis=1)
+        actual = self.calculator.calibrate_dataframe(self.data_frame)
+
+        np.testing.assert_allclose(actual.values, expected.values, atol=1e-12)
+
+    def test_inactive_and_unknown_sectors_are_nan(self):
+
+        calibrated = self.calculator.calibrate_series([180.0, 45.0, np.nan, 90.0], [10.0, 10.0, 10.0, 10.0])
+
+        self.assertTrue(np.isnan(calibrated[:3]).all())
+        self.assertAlmostEqual(calibrated[3], 9.6)
+
+
+class CalibrationDataset(Dataset):
+
+    # only the attributes read by the convergence check
+    def __init__(self):
+        pass
+
+
+class TestVRatioConvergenceCheck(unittest.TestCase):
+
+    def setUp(self):
+
+        random = np.random.RandomState(0)
+
+        self.dataset = CalibrationDataset()
+
+        self.dataset.referenceWindSpeed = 'Reference Speed'
+        self.dataset.turbineLocationWindSpeed = 'Turbine Speed'
+        self.dataset.referenceDirectionBin = 'Direction Bin'
+
+        reference = random.uniform(3.0, 15.0, 1000)
+
+        data_frame = pd.DataFrame({'Reference Speed': reference,
+                                   'Turbine Speed': reference * random.normal(1.02, 0.05, 1000),
+                                   'Direction Bin': random.choice([0.0, 30.0, 60.0, 90.0], 1000)},
+                                  index=pd.date_range('2016-01-01', periods=1000, freq='10min'))
+
+        data_frame.iloc[::13, 1] = np.nan
+        data_frame.iloc[::17, 2] = np.nan
+        data_frame.loc[data_frame['Direction Bin'] == 90.0, 'Direction Bin'] = np.where(np.arange((data_frame['Direction Bin'] == 90.0).sum()) < 100, 90.0, 60.0)
+
+        self.dataset.filteredCalibrationDataframe = data_frame
+
+    def expected_convergence(self):
+
+        # row by row cumulative mean of each sector
+        df = self.dataset.filteredCalibrationDataframe
+        conv_check = pd.DataFrame()
+
+        for dir_bin in sorted(df['Direction Bin'].dropna().unique()):
+            sect_df = df[df['Direction Bin'] == dir_bin].reset_index().loc[:, ['Reference Speed', 'Turbine Speed']]
+            sect_df['vRatio'] = sect_df['Turbine Speed'] / sect_df['Reference Speed']
+            sect_df = sect_df[~np.isnan(sect_df['vRatio'])].reset_index()
+            sect_df['rolling_mean_vRatio'] = np.nan
+            for i in range(len(sect_df)):
+                sect_df.loc[i, 'rolling_mean_vRatio'] = sect_df.loc[sect_df.index < i + 1, 'vRatio'].mean()
+            sect_df['rolling_mean_vRatio'] /= sect_df.loc[sect_df.index[-1], 'rolling_mean_vRatio']
+            conv_check = pd.concat([conv_check, pd.DataFrame(sect_df['rolling_mean_vRatio']).rename(columns={'rolling_mean_vRatio': int(dir_bin)})], axis=1)
+
+        conv_check.index += 1
+
+        return conv_check
+
+    def test_convergence_matches_row_calculation(self):
+
+        expected = self.expected_convergence()
+
+        self.dataset._v_ratio_convergence_check()
+
+        actual = self.dataset.calibrationSectorConverge
+
+        self.assertEqual(list(actual.columns), list(expected.columns))
+        self.assertEqual(list(actual.index), list(expected.index))
+
+        np.testing.assert_allclose(actual.values, expected.values, rtol=1e-12)
+
+    def test_summary_taken_at_8_16_and_24_hours(self):
+
+        self.dataset._v_ratio_convergence_check()
+
+        converge = self.dataset.calibrationSectorConverge
+        summary = self.dataset.calibrationSectorConvergeSummary
+
+        self.assertEqual(list(summary.index), [0, 30, 60, 90])
+        self.assertEqual(summary.loc[60, 'rolling_mean_vRatio_16hrs'], converge.loc[96, 60])
+        self.assertTrue(np.isnan(summary.loc[90, 'rolling_mean_vRatio_24hrs']))
+
+
+class TestRawDataColumns(unittest.TestCase):
+
+    def test_only_configured_columns_loaded(self):
+
+        config = DatasetConfiguration(join(FILE_DIR, 'data', 'test_dataset_config.xml'))
+        config.filters.append(Filter(True, 'Inflow50', 'Below', False, 0.0))
+
+        dataset = Dataset(config)
+
+        raw_columns = dataset.parse_raw_data(config).columns
+
+        self.assertIn('Inflow50', raw_columns)
+        self.assertIn('WS_std', raw_columns)
+        self.assertNotIn('WDir50', raw_columns)
+        self.assertNotIn('Inflow75', raw_columns)
+
+        self.assertNotIn('WDir50', dataset.fullDataFrame.columns)
+
+
+class TestDatasetCache(unittest.TestCase):
+
+    def setUp(self):
+
+        self.folder = DatasetCache.Folder
+        self.maximum_size = DatasetCache.MaximumSize
+        self.enabled = DatasetCache.Enabled
+
+        DatasetCache.Folder = tempfile.mkdtemp()
+        DatasetCache.Enabled = True
+
+    def tearDown(self):
+
+        shutil.rmtree(DatasetCache.Folder)
+
+        DatasetCache.Folder = self.folder
+        DatasetCache.MaximumSize = self.maximum_size
+        DatasetCache.Enabled = self.enabled
+
+    def test_cached_dataset_matches_parsed_dataset(self):
+
+        config = DatasetConfiguration(join(FILE_DIR, 'data', 'test_dataset_config.xml'))
+
+        parsed = Dataset(config)
+
+        self.assertEqual(len(os.listdir(DatasetCache.Folder)), 1)
+
+        cached = Dataset(config)
+
+        pd.util.testing.assert_frame_equal(cached.fullDataFrame, parsed.fullDataFrame)
+        pd.util.testing.assert_frame_equal(cached.dataFrame, parsed.dataFrame)
+
+    def test_key_depends_on_parse_settings(self):
+
+        path = join(FILE_DIR, 'data', 'test_dataset.csv')
+
+        self.assertEqual(DatasetCache.key(path, ('Timestamp', 'TAB')), DatasetCache.key(path, ('Timestamp', 'TAB')))
+        self.assertNotEqual(DatasetCache.key(path, ('Timestamp', 'TAB')), DatasetCache.key(path, ('Timestamp', 'COMMA')))
+
+    def test_key_depends_on_whitespace(self):
+
+        first = join(DatasetCache.Folder, 'first.csv')
+        second = join(DatasetCache.Folder, 'second.csv')
+
+        with open(first, 'w') as f:
+            f.write("1.0 2,3")
+
+        with open(second, 'w') as f:
+            f.write("1.02 ,3")
+
+        self.assertNotEqual(DatasetCache.key(first, ('Timestamp', 'COMMA')), DatasetCache.key(second, ('Timestamp', 'COMMA')))
+
+    def test_key_depends_on_version(self):
+
+        path = join(FILE_DIR, 'data', 'test_dataset.csv')
+
+        key = DatasetCache.key(path, ('Timestamp', 'TAB'))
+
+        version = ver.version
+        ver.version = version + '.test'
+
+        try:
+            self.assertNotEqual(DatasetCache.key(path, ('Timestamp', 'TAB')), key)
+        finally:
+            ver.version = version
+
+    def test_key_reuses_file_digest(self):
+
+        path = join(FILE_DIR, 'data', 'test_dataset.csv')
+
+        key = DatasetCache.key(path, ('Timestamp', 'TAB'))
+
+        stat = os.stat(path)
+        digest_key = (os.path.abspath(path), stat.st_size, stat.st_mtime, False)
+
+        digest = FileDigests.Digests[digest_key]
+        FileDigests.Digests[digest_key] = 'remembered digest'
+
+        try:
+            self.assertNotEqual(DatasetCache.key(path, ('Timestamp', 'TAB')), key)
+        finally:
+            FileDigests.Digests[digest_key] = digest
+
+    def test_least_recently_used_entries_evicted(self):
+
+        data_frame = pd.DataFrame({'Speed': np.arange(1000.0), 'Name': ['a'] * 1000},
+                                  index=pd.date_range('2016-01-01', periods=1000, freq='10min', name='Timestamp'))
+
+        DatasetCache.store('first', data_frame)
+        entry_size = os.path.getsize(DatasetCache.entry_path('first'))
+
+        DatasetCache.MaximumSize = int(2.5 * entry_size)
+
+        DatasetCache.store('second', data_frame)
+        os.utime(DatasetCache.entry_path('first'), (0, 0))
+        os.utime(DatasetCache.entry_path('second'), (1, 1))
+
+        DatasetCache.load('first')
+        DatasetCache.store('third', data_frame)
+
+        self.assertIsNone(DatasetCache.load('second'))
+
+        pd.util.testing.assert_frame_equal(DatasetCache.load('first'), data_frame)
+        pd.util.testing.assert_frame_equal(DatasetCache.load('third'), data_frame)
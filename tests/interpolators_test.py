@@ -1,11 +1,18 @@
 import pcwg.core.interpolators as interpolators
 import unittest
+import numpy as np
 
 from pcwg.core.binning import Bins
 
 
 class TestMarmanderPowerCurveInterpolator(unittest.TestCase):
 
+    def setUp(self):
+        self.solver = interpolators.MarmanderPowerCurveInterpolatorBase.Solver
+
+    def tearDown(self):
+        interpolators.MarmanderPowerCurveInterpolatorBase.Solver = self.solver
+
     def test_spreadsheet_benchmark(self):
 
         x = [1.00,
@@ -137,6 +144,36 @@ class TestMarmanderPowerCurveInterpolator(unittest.TestCase):
                     0.0
                     ]
 
+        for solver in ['Fixed Point', 'Anderson']:
+            self.check_spreadsheet_benchmark(x, y, cutOutWindSpeed, limits, expectedX, expectedY, solver)
+
+    def test_anderson_solver_reduces_iterations(self):
+
+        x = [3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0, 11.0, 12.0, 13.0, 14.0, 15.0, 16.0]
+        y = [0.0, 60.0, 180.0, 350.0, 580.0, 880.0, 1250.0, 1610.0, 1850.0, 1960.0, 2000.0, 2000.0, 2000.0, 2000.0]
+
+        limits = Bins(0.0, 1.0, 30.0).limits
+
+        iterations = {}
+
+        for solver in ['Fixed Point', 'Anderson']:
+
+            interpolators.MarmanderPowerCurveInterpolatorBase.Solver = solver
+
+            interpolator = interpolators.MarmanderPowerCurveInterpolatorCubicHermite(x, y, 25.0, x_limits=limits)
+
+            self.assertEqual(len(interpolator.residuals), interpolator.iterations + 1)
+            self.assertTrue(interpolator.residuals[-1] <= interpolators.MarmanderPowerCurveInterpolatorBase.Tolerance)
+            self.assertTrue(interpolator.residuals[-2] > interpolators.MarmanderPowerCurveInterpolatorBase.Tolerance)
+
+            iterations[solver] = interpolator.iterations
+
+        self.assertTrue(iterations['Anderson'] < iterations['Fixed Point'])
+
+    def check_spreadsheet_benchmark(self, x, y, cutOutWindSpeed, limits, expectedX, expectedY, solver):
+
+        interpolators.MarmanderPowerCurveInterpolatorBase.Solver = solver
+
         interpolator = interpolators.MarmanderPowerCurveInterpolatorCubicSpline(x, y, cutOutWindSpeed, x_limits= limits, debug = False)
 
         if interpolator.debug:
@@ -170,5 +207,85 @@ class TestMarmanderPowerCurveInterpolator(unittest.TestCase):
             print "{0:.2f}\t{1:.2f}\t{2:.2f}\t{3:.2f}%\t{4:.2f}%\t{5}".format(expectedX[i], expectedY[i], actual, (errorPercent * 100.0), (tolerancePercent * 100.0), match)
             self.assertTrue(match)
 
+
+class TestMarmanderAndersonSolver(unittest.TestCase):
+
+    def test_worse_step_returns_to_best_powers(self):
+
+        solver = interpolators.MarmanderAndersonSolver(5)
+
+        best_proposed = np.array([1.5, 1.2])
+
+        np.testing.assert_array_equal(solver.next(np.array([0.0, 0.0]), np.array([1.0, 1.0]), 1.0), [1.0, 1.0])
+
+        accelerated = solver.next(np.array([1.0, 1.0]), best_proposed, 0.5)
+
+        # the accelerated step raised the RMSE, so the plain update from the best powers is taken instead
+        np.testing.assert_array_equal(solver.next(accelerated, np.array([4.0, -3.0]), 2.0), best_proposed)
+
+        # that update is kept (and accelerated from) even though it is no better
+        self.assertFalse(np.array_equal(solver.next(best_proposed, np.array([1.6, 1.1]), 3.0), best_proposed))
+        self.assertEqual(solver.best_rmse, 3.0)
+
+
+class TestMarmanderIntegrationGrid(unittest.TestCase):
+
+    def setUp(self):
+
+        self.f = interpolators.CubicHermitePowerCurveInterpolator([3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0],
+                                                                   [0.0, 50.0, 150.0, 320.0, 560.0, 900.0, 1300.0, 1500.0],
+                                                                   9.5)
+
+    def loop_average(self, start, end):
+
+        total = 0.0
+        wind_speed = start
+        count = 0
+
+        while wind_speed <= end:
+            total += self.f(wind_speed)
+            wind_speed += 0.01
+            count += 1
+
+        return total / float(count)
+
+    def test_partition_wind_speeds_match_loop(self):
+
+        for start, end in [(2.5, 3.5), (0.0, 0.0), (3.14, 9.87), (9.5, 10.5)]:
+
+            expected = []
+            wind_speed = start
+
+            while wind_speed <= end:
+                expected.append(wind_speed)
+                wind_speed += 0.01
+
+            np.testing.assert_array_equal(interpolators.partition_wind_speeds(start, end, 0.01), expected)
+
+    def test_grid_matches_loop_average(self):
+
+        limits = [interpolators.MarmanderLimit(2.5, 3.5),
+                  interpolators.MarmanderLimit(5.5, 6.5),
+                  interpolators.MarmanderLimit(9.0, 10.0)]
+
+        # weighted and unweighted partitions
+        limits[1].partitions = [interpolators.MarmanderLimitPartition(5.5, 6.0, 0.25),
+                                interpolators.MarmanderLimitPartition(6.0, 6.5, 0.75)]
+
+        limits[2].partitions = [interpolators.MarmanderLimitPartition(9.0, 9.5, 0.0),
+                                interpolators.MarmanderLimitPartition(9.5, 10.0, 0.0)]
+
+        expected = [self.loop_average(2.5, 3.5),
+                    0.25 * self.loop_average(5.5, 6.0) + 0.75 * self.loop_average(6.0, 6.5),
+                    0.5 * self.loop_average(9.0, 9.5) + 0.5 * self.loop_average(9.5, 10.0)]
+
+        grid = interpolators.MarmanderIntegrationGrid(limits, 0.01)
+
+        np.testing.assert_allclose(grid.integrate(self.f), expected, rtol=1e-12)
+
+    def test_empty_partition_rejected(self):
+
+        self.assertRaises(Exception, interpolators.MarmanderIntegrationGrid, [interpolators.MarmanderLimit(5.0, 4.0)], 0.01)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import numpy as np
+from os.path import join, dirname, realpath
+
+from pcwg.configuration.power_deviation_matrix_configuration import PowerDeviationMatrixConfiguration
+
+DATA_DIR = join(dirname(dirname(realpath(__file__))), 'Data')
+
+
+class TestPowerDeviationMatrixDeviations(unittest.TestCase):
+
+    def counters(self, matrix):
+
+        return (matrix.total_count,
+                matrix.value_not_found,
+                matrix.in_range_unpopulated,
+                matrix.out_of_range_count,
+                dict(matrix.out_of_range_count_by_dimension),
+                dict(matrix.below_count_by_dimension),
+                dict(matrix.above_count_by_dimension))
+
+    def check_matrix(self, file_name):
+
+        random = np.random.RandomState(0)
+
+        matrix = PowerDeviationMatrixConfiguration(join(DATA_DIR, file_name))
+
+        count = 2000
+
+        powers = random.uniform(-100.0, 2000.0, count)
+        powers[::50] = np.nan
+
+        parameters = {}
+
+        for dimension in matrix.dimensions:
+
+            low = dimension.centerOfFirstBin - 2.0 * dimension.binWidth
+            high = dimension.centerOfLastBin + 2.0 * dimension.binWidth
+
+            values = random.uniform(low, high, count)
+            values[::37] = np.nan
+
+            # exact bin centres and edges
+            values[1::41] = dimension.centerOfFirstBin + dimension.binWidth * random.randint(0, dimension.numberOfBins, len(values[1::41]))
+            values[2::43] = dimension.centerOfFirstBin + dimension.binWidth * (random.randint(0, dimension.numberOfBins, len(values[2::43])) + 0.5)
+
+            parameters[dimension.parameter] = values
+
+        matrix.reset_out_of_range_count()
+
+        expected = [matrix.get_deviation(powers[i], dict((parameter, parameters[parameter][i]) for parameter in parameters))
+                    for i in range(count)]
+
+        expected_counters = self.counters(matrix)
+
+        matrix.reset_out_of_range_count()
+
+        actual = matrix.get_deviations(powers, parameters)
+
+        np.testing.assert_array_equal(actual, expected)
+        self.assertEqual(self.counters(matrix), expected_counters)
+
+    def test_2d_matrix(self):
+        self.check_matrix('HypothesisMatrix_2D_Share3_A.xml')
+
+    def test_3d_matrix(self):
+        self.check_matrix('HypothesisMatrix_3D_Share3_C.xml')
+
+    def test_dense_matrix_holds_cells(self):
+
+        matrix = PowerDeviationMatrixConfiguration(join(DATA_DIR, 'HypothesisMatrix_3D_Share3_B.xml'))
+
+        dense = matrix.dense_matrix()
+
+        self.assertEqual(np.count_nonzero(~np.isnan(dense)), len(matrix.cells))
@@ -0,0 +1,133 @@
+import unittest
+import numpy as np
+import pandas as pd
+from os.path import join, dirname, realpath
+
+from pcwg.configuration.power_curve_configuration import PowerCurveConfiguration
+from pcwg.core import rews
+from pcwg.core import turbine
+
+FILE_DIR = dirname(realpath(__file__))
+
+
+class TestRotorEquivalentWindSpeedArrays(unittest.TestCase):
+
+    def setUp(self):
+
+        random = np.random.RandomState(0)
+
+        self.rotor_geometry = turbine.RotorGeometry(80.0, 80.0, tilt=5.0)
+
+        heights = [40.0, 60.0, 80.0, 100.0, 120.0]
+
+        speed_levels = {}
+        direction_levels = {}
+        upflow_levels = {}
+
+        data = {}
+
+        for height in heights:
+
+            speed_levels[height] = 'Speed %d' % height
+            direction_levels[height] = 'Direction %d' % height
+            upflow_levels[height] = 'Upflow %d' % height
+
+            data[speed_levels[height]] = random.uniform(3.0, 20.0, 200) * (height / 80.0) ** 0.2
+            data[direction_levels[height]] = random.uniform(-10.0, 370.0, 200)
+            data[upflow_levels[height]] = random.uniform(-1.0, 1.0, 200)
+
+        self.data_frame = pd.DataFrame(data)
+        self.data_frame.loc[::23, 'Speed 60'] = np.nan
+        self.data_frame.loc[::29, 'Direction 100'] = np.nan
+
+        self.profile_levels = rews.ProfileLevels(self.rotor_geometry, speed_levels, direction_levels, upflow_levels)
+
+        self.rotors = [rews.EvenlySpacedRotor(self.rotor_geometry, 7),
+                       rews.ProfileLevelsRotor(self.rotor_geometry, self.profile_levels)]
+
+        self.hub_calculators = [rews.InterpolatedHubWindSpeed(self.profile_levels, self.rotor_geometry),
+                                rews.PiecewiseExponentHubWindSpeed(self.profile_levels, self.rotor_geometry)]
+
+    def test_hub_wind_speeds_match_row_calculation(self):
+
+        for calculator in self.hub_calculators:
+
+            expected = self.data_frame.apply(calculator.hubWindSpeed, axis=1)
+
+            np.testing.assert_allclose(calculator.hubWindSpeeds(self.data_frame), expected.values.astype(float), rtol=1e-12)
+
+    def test_rews_to_hub_ratios_match_row_calculation(self):
+
+        for rotor in self.rotors:
+            for calculator in self.hub_calculators:
+                for veer, upflow, exponent in [(False, False, 3.0), (True, False, 3.0), (True, True, 3.0), (False, True, 1.0)]:
+
+                    rews_calculator = rews.RotorEquivalentWindSpeed(self.profile_levels, rotor, calculator, veer, upflow, exponent)
+
+                    expected = self.data_frame.apply(rews_calculator.rewsToHubRatio, axis=1)
+                    actual = rews_calculator.rewsToHubRatios(self.data_frame)
+
+                    np.testing.assert_allclose(actual, expected.values, rtol=1e-10)
+
+    def test_production_by_height_matches_row_calculation(self):
+
+        config = PowerCurveConfiguration(join(FILE_DIR, 'data', 'test_power_curve.xml'))
+
+        power_curve = turbine.PowerCurve(self.rotor_geometry,
+                                         config.density,
+                                         config.data_frame,
+                                         config.speed_column,
+                                         config.turbulence_column,
+                                         config.power_column)
+
+        production_by_height = rews.ProductionByHeight(self.profile_levels, self.rotors[0], self.hub_calculators[0], power_curve)
+
+        expected = self.data_frame.apply(production_by_height.calculate, axis=1)
+
+        np.testing.assert_allclose(production_by_height.calculate_array(self.data_frame), expected.values, atol=1e-8)
+
+    def test_rotor_outside_profile_rejected(self):
+
+        rotor = rews.EvenlySpacedRotor(turbine.RotorGeometry(120.0, 80.0), 5)
+
+        rews_calculator = rews.RotorEquivalentWindSpeed(self.profile_levels, rotor, self.hub_calculators[0], False, False, 3.0)
+
+        self.assertRaises(Exception, rews_calculator.rewsValues, self.data_frame)
+
+
+class TestProfileInterpolation(unittest.TestCase):
+
+    def test_interpolate_matches_numpy_interp(self):
+
+        random = np.random.RandomState(0)
+
+        levels = [40.0, 55.0, 80.0, 100.0, 120.0]
+        heights = [40.0, 47.5, 55.0, 63.0, 80.0, 99.9, 120.0]
+
+        values = random.uniform(3.0, 15.0, (50, len(levels)))
+        values[::7, 1] = np.nan
+        values[::9, 4] = np.nan
+
+        interpolation = rews.ProfileInterpolation(levels, heights)
+
+        expected = np.array([np.interp(heights, levels, row) for row in values])
+
+        np.testing.assert_array_equal(interpolation.interpolate(values), expected)
+
+    def test_levels_without_columns_are_skipped(self):
+
+        rotor_geometry = turbine.RotorGeometry(80.0, 80.0)
+
+        speed_levels = {40.0: 'Speed 40', 60.0: None, 80.0: 'Speed 80', 120.0: 'Speed 120'}
+
+        profile_levels = rews.ProfileLevels(rotor_geometry, speed_levels)
+
+        data_frame = pd.DataFrame({'Speed 40': [6.0, 7.0], 'Speed 80': [8.0, 9.0], 'Speed 120': [10.0, 12.0]})
+
+        profiles = profile_levels.getWindSpeedProfiles(data_frame, [60.0, 100.0])
+
+        np.testing.assert_allclose(profiles, [[7.0, 9.0], [8.0, 10.5]])
+
+        profile_levels.getWindSpeedProfiles(data_frame, [60.0, 100.0])
+
+        self.assertEqual(len(profile_levels.interpolations), 1)
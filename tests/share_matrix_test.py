@@ -0,0 +1,154 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from pcwg.share.share_matrix import MatrixPartial
+from pcwg.share.share_matrix import PostProcessMatrices
+from pcwg.share.share_matrix import ShareAnalysisMatrix
+from pcwg.share.share_matrix import ShareMatrixDatasetResult
+from pcwg.share.share_matrix import calculate_matrix_ranges
+from pcwg.share.share import ShareAnalysisBase
+
+
+class PowerDeviations(object):
+
+    def __init__(self, deviation_matrix, count_matrix):
+        self.deviation_matrix = deviation_matrix
+        self.count_matrix = count_matrix
+
+
+class Result(object):
+
+    def __init__(self, power_deviations):
+        self.power_deviations = power_deviations
+        self.bins = None
+        self.partial = MatrixPartial.from_power_deviations(power_deviations)
+
+    @classmethod
+    def from_partial(cls, partial):
+
+        result = cls.__new__(cls)
+        result.bins = None
+        result.partial = partial
+
+        return result
+
+
+class TestMatrixPartial(unittest.TestCase):
+
+    def setUp(self):
+
+        random = np.random.RandomState(0)
+
+        self.results = []
+
+        for i in range(3):
+
+            cells = sorted(random.choice(range(12), 8, replace=False))
+            index = pd.MultiIndex.from_tuples([(0.1 * (cell // 4), 0.01 * (cell % 4)) for cell in cells])
+
+            count_matrix = pd.Series(random.randint(1, 40, len(cells)), index=index).astype(float)
+            deviation_matrix = pd.Series(random.uniform(-0.1, 0.1, len(cells)), index=index)
+            deviation_matrix[count_matrix < ShareAnalysisMatrix.MINIMUM_COUNT] = np.nan
+
+            self.results.append(Result(PowerDeviations(deviation_matrix, count_matrix)))
+
+    def assert_partials_equal(self, first, second):
+
+        for name in ['sum_of_deviations', 'count', 'sum_of_matrices', 'matrix_count']:
+            pd.util.testing.assert_series_equal(getattr(first, name).sort_index(), getattr(second, name).sort_index())
+
+    def test_merge_is_associative(self):
+
+        first, second, third = [result.partial for result in self.results]
+
+        self.assert_partials_equal(first.merge(second).merge(third), first.merge(second.merge(third)))
+
+    def test_combined_matrices(self):
+
+        post_processed = PostProcessMatrices(self.results)
+
+        deviations = pd.concat([result.power_deviations.deviation_matrix for result in self.results], axis=1)
+        counts = pd.concat([result.power_deviations.count_matrix for result in self.results], axis=1)
+
+        valid = counts.where(counts >= ShareAnalysisMatrix.MINIMUM_COUNT)
+
+        average_of_deviations = (deviations * valid).sum(axis=1) / valid.sum(axis=1)
+        average_of_matrices = (deviations * valid.notnull()).sum(axis=1) / valid.notnull().sum(axis=1)
+
+        actual = post_processed.average_of_deviations_matrix.deviation_matrix
+
+        np.testing.assert_allclose(actual.values, average_of_deviations.reindex(actual.index).values)
+        self.assertEqual(len(actual), average_of_deviations.notnull().sum())
+
+        actual = post_processed.average_of_matrices_matrix.deviation_matrix
+
+        np.testing.assert_allclose(actual.values, average_of_matrices.reindex(actual.index).values)
+
+    def test_merge_grouping_does_not_change_matrices(self):
+
+        first, second, third = self.results
+
+        in_order = PostProcessMatrices([first, second, third])
+        regrouped = PostProcessMatrices([Result.from_partial(second.partial.merge(third.partial)), first])
+
+        for name in ['average_of_deviations_matrix', 'average_of_matrices_matrix']:
+
+            expected = getattr(in_order, name)
+            actual = getattr(regrouped, name)
+
+            index = expected.deviation_matrix.index
+
+            self.assertEqual(sorted(actual.deviation_matrix.index), sorted(index))
+
+            np.testing.assert_allclose(actual.deviation_matrix.reindex(index).values, expected.deviation_matrix.values, rtol=1e-12)
+            np.testing.assert_array_equal(actual.count_matrix.reindex(index).values, expected.count_matrix.reindex(index).values)
+
+    def test_sparse_cell_of_first_dataset_excluded(self):
+
+        # the first dataset's cell is below the minimum count, so only the second dataset contributes
+        index = pd.MultiIndex.from_tuples([(0.1, 0.01)])
+
+        sparse = Result(PowerDeviations(pd.Series([0.5], index=index), pd.Series([1.0], index=index)))
+        populated = Result(PowerDeviations(pd.Series([0.2], index=index), pd.Series([20.0], index=index)))
+
+        post_processed = PostProcessMatrices([sparse, populated])
+
+        self.assertAlmostEqual(post_processed.average_of_matrices_matrix.deviation_matrix[(0.1, 0.01)], 0.2)
+        self.assertEqual(post_processed.average_of_matrices_matrix.count_matrix[(0.1, 0.01)], 1.0)
+
+        self.assertAlmostEqual(post_processed.average_of_deviations_matrix.deviation_matrix[(0.1, 0.01)], 0.2)
+        self.assertEqual(post_processed.average_of_deviations_matrix.count_matrix[(0.1, 0.01)], 20.0)
+
+
+class FailingShare(object):
+
+    def __init__(self):
+        self.analysis = 'analysis'
+        self.success = False
+        self.ranges = []
+
+    def calculate_for_range(self, inner_range):
+        self.ranges.append(inner_range)
+
+
+class TestShareMatrixDatasetResult(unittest.TestCase):
+
+    def test_result_only_holds_values(self):
+
+        result = ShareMatrixDatasetResult({'A': 'info'}, {'A': '2D'}, {'A': '3D'})
+
+        self.assertEqual(result.infos, {'A': 'info'})
+        self.assertEqual(result.results_2D, {'A': '2D'})
+        self.assertEqual(result.results_3D, {'A': '3D'})
+        self.assertTrue(result.success)
+
+    def test_each_inner_range_calculated(self):
+
+        share = FailingShare()
+
+        result = calculate_matrix_ranges(share)
+
+        self.assertEqual(share.ranges, sorted(ShareAnalysisBase.pcwg_inner_ranges))
+        self.assertEqual(result.infos, {})
+        self.assertFalse(result.success)
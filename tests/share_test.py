@@ -0,0 +1,366 @@
+import hashlib
+import os
+import Queue
+import shutil
+import tempfile
+import unittest
+
+from pcwg.configuration.dataset_configuration import DatasetConfiguration
+from pcwg.core.status import Status
+from pcwg.share.share1 import ShareAnalysis1
+from pcwg.share.share import ShareAnalysisBase
+from pcwg.share.share import ShareResultCache
+from pcwg.share.share import ShareXPortfolio
+from pcwg.share.share import ValidRangeCache
+from pcwg.share.share import initialize_portfolio_worker
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestHashFileContents(unittest.TestCase):
+
+    def setUp(self):
+
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'time_series.dat')
+
+        self.chunk_size = ShareAnalysisBase.HASH_CHUNK_SIZE
+        ShareAnalysisBase.HASH_CHUNK_SIZE = 7
+
+        self.analysis = ShareAnalysisBase.__new__(ShareAnalysisBase)
+
+    def tearDown(self):
+
+        ShareAnalysisBase.HASH_CHUNK_SIZE = self.chunk_size
+        shutil.rmtree(self.folder)
+
+    def write(self, contents):
+
+        with open(self.path, 'wb') as f:
+            f.write(contents)
+
+    def whole_file_hash(self):
+
+        with open(self.path, 'r') as f:
+            return hashlib.sha1(''.join(f.read().split())).hexdigest()
+
+    def test_matches_whole_file_hash(self):
+
+        self.write('Time\tSpeed \r\n01/01/2016 00:00,\x0b5.0\x0c\n' + ''.join(chr(i) for i in range(256)) * 3)
+
+        self.assertEqual(self.analysis.hash_file_contents(self.path), self.whole_file_hash())
+
+    def test_whitespace_insensitive(self):
+
+        self.write('a b\tc\n')
+        spaced = self.analysis.hash_file_contents(self.path)
+
+        self.write('abc')
+        os.utime(self.path, (0, 0))
+
+        self.assertEqual(self.analysis.hash_file_contents(self.path), spaced)
+
+    def test_changed_file_rehashed(self):
+
+        self.write('1,2,3\n')
+        os.utime(self.path, (1000, 1000))
+        first = self.analysis.hash_file_contents(self.path)
+
+        self.write('1,2,4\n')
+        os.utime(self.path, (2000, 2000))
+
+        self.assertNotEqual(self.analysis.hash_file_contents(self.path), first)
+        self.assertEqual(self.analysis.hash_file_contents(self.path), self.whole_file_hash())
+
+
+class TestPortfolioWorkerMessages(unittest.TestCase):
+
+    def setUp(self):
+        self.instance = Status.Instance
+        Status.Instance = None
+
+    def tearDown(self):
+        Status.Instance = self.instance
+
+    def test_worker_status_forwarded_to_parent(self):
+
+        messages = Queue.Queue()
+
+        initialize_portfolio_worker(messages, 1)
+
+        Status.add("first\nsecond", red=True)
+        Status.add("detail", verbosity=2)
+        Status.set_portfolio_status(1, 3, False)
+
+        received = []
+        progress = []
+
+        Status.Instance = None
+        Status.initialize_status(lambda message, red, orange, verbosity: received.append((message, red, orange)),
+                                 lambda completed, total, finished: progress.append((completed, total, finished)))
+
+        portfolio = ShareXPortfolio.__new__(ShareXPortfolio)
+        portfolio.forward_worker_messages(messages)
+
+        self.assertEqual(received, [("first", True, False), ("second", True, False)])
+        self.assertEqual(progress, [(1, 3, False)])
+        self.assertTrue(messages.empty())
+
+
+class TestValidRangeCache(unittest.TestCase):
+
+    def setUp(self):
+
+        self.folder = tempfile.mkdtemp()
+
+        self.cache_folder = ValidRangeCache.Folder
+        self.enabled = ValidRangeCache.Enabled
+        self.entries = ValidRangeCache.Entries
+
+        ValidRangeCache.Folder = os.path.join(self.folder, 'valid_ranges')
+        ValidRangeCache.Enabled = True
+        ValidRangeCache.Entries = None
+
+    def tearDown(self):
+
+        ValidRangeCache.Folder = self.cache_folder
+        ValidRangeCache.Enabled = self.enabled
+        ValidRangeCache.Entries = self.entries
+
+        shutil.rmtree(self.folder)
+
+    def test_results_persisted(self):
+
+        key = ValidRangeCache.key('config', 'time series')
+
+        ValidRangeCache.register(key, 'dataset.xml', 'A', True, 16, True)
+        ValidRangeCache.register(key, 'dataset.xml', 'B', False, 9, False)
+        ValidRangeCache.save(key)
+
+        ValidRangeCache.Entries = None
+
+        self.assertEqual(ValidRangeCache.get(key, 'A'), (True, 16, True))
+        self.assertFalse(ValidRangeCache.is_valid(key, 'B'))
+        self.assertFalse(ValidRangeCache.is_known(key, 'C'))
+        self.assertFalse(ValidRangeCache.is_known(ValidRangeCache.key('config', 'other'), 'A'))
+
+    def test_changed_dataset_invalidates_entry(self):
+
+        old_key = ValidRangeCache.key('config', 'time series')
+        new_key = ValidRangeCache.key('config', 'edited time series')
+
+        ValidRangeCache.register(old_key, 'dataset.xml', 'A', True, 16, True)
+        ValidRangeCache.register(ValidRangeCache.key('other', 'other'), 'other.xml', 'A', True, 12, True)
+        ValidRangeCache.save(old_key)
+
+        ValidRangeCache.register(new_key, 'dataset.xml', 'A', False, 4, False)
+        ValidRangeCache.save(new_key)
+
+        ValidRangeCache.Entries = None
+
+        self.assertFalse(ValidRangeCache.is_known(old_key, 'A'))
+        self.assertEqual(ValidRangeCache.get(new_key, 'A'), (False, 4, False))
+        self.assertEqual(len(os.listdir(ValidRangeCache.Folder)), 1)
+
+    def test_concurrent_runs_keep_each_others_entries(self):
+
+        first_key = ValidRangeCache.key('first', 'time series')
+        second_key = ValidRangeCache.key('second', 'time series')
+
+        # both runs read the cache before either has saved
+        self.assertFalse(ValidRangeCache.is_known(first_key, 'A'))
+        second_run_entries = {second_key: None}
+
+        ValidRangeCache.register(first_key, 'first.xml', 'A', True, 16, True)
+        ValidRangeCache.save(first_key)
+
+        ValidRangeCache.Entries = second_run_entries
+        ValidRangeCache.register(second_key, 'second.xml', 'A', True, 12, True)
+        ValidRangeCache.save(second_key)
+
+        ValidRangeCache.Entries = None
+
+        self.assertEqual(ValidRangeCache.get(first_key, 'A'), (True, 16, True))
+        self.assertEqual(ValidRangeCache.get(second_key, 'A'), (True, 12, True))
+        self.assertEqual([f for f in os.listdir(ValidRangeCache.Folder) if f.endswith('.tmp')], [])
+
+    def test_disabled_cache_not_persisted(self):
+
+        ValidRangeCache.Enabled = False
+
+        key = ValidRangeCache.key('config', 'time series')
+
+        ValidRangeCache.register(key, 'dataset.xml', 'A', True, 16, True)
+        ValidRangeCache.save(key)
+
+        self.assertFalse(os.path.exists(ValidRangeCache.Folder))
+
+
+    def test_failed_trials_not_persisted(self):
+
+        analysis = ShareAnalysisBase.__new__(ShareAnalysisBase)
+
+        analysis.path = 'dataset.xml'
+        analysis.valid_range_key = ValidRangeCache.key('config', 'time series')
+
+        analysis.get_inner_range_trial_key = lambda inner_range_id: inner_range_id
+
+        # A is sufficient, B has too few complete bins and C failed with an error
+        analysis.calculate_inner_range_trials = lambda inner_range_ids: [(None, True, 16, True, True),
+                                                                          (None, False, 4, False, True),
+                                                                          (None, False, 0, False, False)]
+
+        self.assertEqual(analysis.calculate_best_inner_range(), 'A')
+
+        ValidRangeCache.Entries = None
+
+        self.assertEqual(ValidRangeCache.get(analysis.valid_range_key, 'A'), (True, 16, True))
+        self.assertEqual(ValidRangeCache.get(analysis.valid_range_key, 'B'), (False, 4, False))
+        self.assertFalse(ValidRangeCache.is_known(analysis.valid_range_key, 'C'))
+
+
+class StoredResult(object):
+
+    def __init__(self, report_data, success=True):
+        self.success = success
+        self.report_name = 'report.xls'
+        self.report_data = report_data
+        self.analysis = None
+
+
+class TestShareResultCache(unittest.TestCase):
+
+    def setUp(self):
+
+        self.cache_folder = ShareResultCache.Folder
+        ShareResultCache.Folder = tempfile.mkdtemp()
+
+        self.folder = ShareResultCache.portfolio_folder('portfolio.xml', 'Share01')
+
+    def tearDown(self):
+
+        shutil.rmtree(ShareResultCache.Folder)
+        ShareResultCache.Folder = self.cache_folder
+
+    def test_stored_result_loaded(self):
+
+        key = ShareResultCache.key('config', 'time series', 'Share01')
+
+        self.assertIsNone(ShareResultCache.load(self.folder, key))
+
+        ShareResultCache.store(self.folder, key, StoredResult('\x00\x01xls'))
+
+        self.assertEqual(ShareResultCache.load(self.folder, key).report_data, '\x00\x01xls')
+
+    def test_key_depends_on_dataset_and_share(self):
+
+        key = ShareResultCache.key('config', 'time series', 'Share01')
+
+        self.assertNotEqual(key, ShareResultCache.key('edited config', 'time series', 'Share01'))
+        self.assertNotEqual(key, ShareResultCache.key('config', 'edited time series', 'Share01'))
+        self.assertNotEqual(key, ShareResultCache.key('config', 'time series', 'Share02'))
+
+        self.assertNotEqual(self.folder, ShareResultCache.portfolio_folder('portfolio.xml', 'Share02'))
+
+    def test_unused_results_removed(self):
+
+        old_key = ShareResultCache.key('config', 'time series', 'Share01')
+        new_key = ShareResultCache.key('config', 'edited time series', 'Share01')
+
+        ShareResultCache.store(self.folder, old_key, StoredResult('old'))
+        ShareResultCache.store(self.folder, new_key, StoredResult('new'))
+
+        ShareResultCache.remove_unused(self.folder, [new_key])
+
+        self.assertIsNone(ShareResultCache.load(self.folder, old_key))
+        self.assertEqual(ShareResultCache.load(self.folder, new_key).report_data, 'new')
+
+    def test_failed_results_recalculated(self):
+
+        portfolio = ShareXPortfolio.__new__(ShareXPortfolio)
+
+        portfolio.incremental = True
+        portfolio.workers = 1
+        portfolio.results_folder = self.folder
+
+        datasets = {'good.xml': 'good', 'failed.xml': 'failed', 'unreported.xml': 'unreported'}
+        results = {'good.xml': StoredResult('good'),
+                   'failed.xml': StoredResult(None, success=False),
+                   'unreported.xml': StoredResult(None)}
+
+        calculated = []
+
+        def calculate(path, share_factory):
+            calculated.append(path)
+            return results[path]
+
+        portfolio.share_factory = None
+        portfolio.load_verified_dataset = lambda index, item: Dataset(item.absolute_path, datasets[item.absolute_path])
+        portfolio.get_result_key = lambda dataset: ShareResultCache.key(dataset.name, 'time series', 'Share01')
+        portfolio.dataset_calculation = lambda: calculate
+        portfolio.add_result = lambda result, output_zip: result.success
+
+        items = [DatasetItem(path) for path in sorted(datasets)]
+
+        portfolio.calculate_all_dataset_results(items, None)
+        self.assertEqual(sorted(calculated), sorted(datasets))
+
+        del calculated[:]
+
+        portfolio.calculate_all_dataset_results(items, None)
+        self.assertEqual(sorted(calculated), ['failed.xml', 'unreported.xml'])
+
+
+class Dataset(object):
+
+    def __init__(self, path, name):
+        self.path = path
+        self.name = name
+
+
+class DatasetItem(object):
+
+    def __init__(self, absolute_path):
+        self.absolute_path = absolute_path
+
+
+class ColumnRecordingShareAnalysis(ShareAnalysis1):
+
+    def calculate_best_inner_range(self):
+
+        columns_before = list(self.dataFrame.columns)
+
+        inner_range_id = ShareAnalysis1.calculate_best_inner_range(self)
+
+        self.trial_columns = (columns_before, list(self.dataFrame.columns))
+
+        return inner_range_id
+
+
+class TestConcurrentInnerRangeTrials(unittest.TestCase):
+
+    def setUp(self):
+
+        self.workers = ShareAnalysisBase.INNER_RANGE_WORKERS
+        self.enabled = ValidRangeCache.Enabled
+        self.entries = ValidRangeCache.Entries
+
+        ShareAnalysisBase.INNER_RANGE_WORKERS = 3
+        ValidRangeCache.Enabled = False
+        ValidRangeCache.Entries = None
+
+    def tearDown(self):
+
+        ShareAnalysisBase.INNER_RANGE_WORKERS = self.workers
+        ValidRangeCache.Enabled = self.enabled
+        ValidRangeCache.Entries = self.entries
+
+    def test_trials_leave_data_frame_unchanged(self):
+
+        dataset = DatasetConfiguration(os.path.join(FILE_DIR, 'data', 'test_dataset_extended_config.xml'))
+
+        analysis = ColumnRecordingShareAnalysis(dataset)
+
+        columns_before, columns_after = analysis.trial_columns
+
+        self.assertEqual(columns_after, columns_before)
@@ -0,0 +1,54 @@
+import threading
+import unittest
+
+from pcwg.core.status import Status
+
+
+class TestStatusCapture(unittest.TestCase):
+
+    def setUp(self):
+
+        self.instance = Status.Instance
+        Status.Instance = None
+
+        self.received = []
+        Status.initialize_status(lambda message, red, orange, verbosity: self.received.append((message, red)))
+
+    def tearDown(self):
+        Status.Instance = self.instance
+
+    def test_captured_messages_replayed(self):
+
+        Status.start_capture()
+        Status.add("first", red=True)
+        Status.add("hidden", verbosity=2)
+        messages = Status.end_capture()
+
+        self.assertEqual(self.received, [])
+
+        Status.add("direct")
+        Status.replay(messages)
+
+        self.assertEqual(self.received, [("direct", False), ("first", True)])
+
+    def test_capture_is_per_thread(self):
+
+        captured = []
+
+        def add_in_thread():
+            Status.start_capture()
+            Status.add("thread")
+            captured.extend(Status.end_capture())
+
+        Status.start_capture()
+
+        thread = threading.Thread(target=add_in_thread)
+        thread.start()
+        thread.join()
+
+        Status.add("main")
+        main_messages = Status.end_capture()
+
+        self.assertEqual([message[0] for message in captured], ["thread"])
+        self.assertEqual([message[0] for message in main_messages], ["main"])
+        self.assertEqual(self.received, [])
@@ -0,0 +1,44 @@
+import datetime
+import unittest
+import pandas as pd
+
+from pcwg.core.timestamps import FixedWidthTimestampFormat, parse_timestamps
+
+
+class TestParseTimestamps(unittest.TestCase):
+
+    def check(self, values, date_format):
+
+        expected = pd.DatetimeIndex([datetime.datetime.strptime(value, date_format) for value in values])
+
+        self.assertTrue(parse_timestamps(values, date_format).equals(expected))
+
+    def test_fixed_width_formats(self):
+
+        times = pd.date_range('2015-12-25', '2016-03-02', freq='37min')
+
+        for date_format in ['%d/%m/%Y %H:%M', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y%m%d%H%M', '%m/%d/%Y']:
+
+            values = [time.strftime(date_format) for time in times]
+
+            self.assertIsNotNone(FixedWidthTimestampFormat(date_format).parse(values))
+
+            self.check(values, date_format)
+
+    def test_other_formats(self):
+
+        self.check(['1/2/2016 3:04', '12/11/2016 13:14'], '%d/%m/%Y %H:%M')
+        self.check(['01-Feb-16 03:04', '12-Nov-16 13:14'], '%d-%b-%y %H:%M')
+
+    def test_invalid_values_rejected(self):
+
+        self.assertIsNone(FixedWidthTimestampFormat('%d/%m/%Y %H:%M').parse(['31/02/2016 00:00']))
+        self.assertIsNone(FixedWidthTimestampFormat('%d/%m/%Y %H:%M').parse(['01/02/2016 24:00']))
+        self.assertIsNone(FixedWidthTimestampFormat('%d/%m/%Y %H:%M').parse(['01/02/2016 00:00 ']))
+
+        self.assertRaises(ValueError, parse_timestamps, ['31/02/2016 00:00'], '%d/%m/%Y %H:%M')
+
+    def test_unsupported_layouts(self):
+
+        self.assertRaises(ValueError, FixedWidthTimestampFormat, '%d-%b-%y')
+        self.assertRaises(ValueError, FixedWidthTimestampFormat, '%Y-%m-%d %')
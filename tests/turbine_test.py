@@ -0,0 +1,270 @@
+import unittest
+import numpy as np
+from os.path import join, dirname, realpath
+
+from pcwg.configuration.power_curve_configuration import PowerCurveConfiguration
+from pcwg.core import turbine
+
+FILE_DIR = dirname(realpath(__file__))
+
+
+class TestPowerCurveArrays(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+
+        config = PowerCurveConfiguration(join(FILE_DIR, 'data', 'test_power_curve.xml'))
+        rotor_geometry = turbine.RotorGeometry(100.0, 100.0)
+
+        cls.power_curves = []
+
+        for mode in ['Linear', 'Cubic Spline', 'Cubic Hermite']:
+            cls.power_curves.append(turbine.PowerCurve(rotor_geometry,
+                                                       config.density,
+                                                       config.data_frame,
+                                                       config.speed_column,
+                                                       config.turbulence_column,
+                                                       config.power_column,
+                                                       interpolation_mode=mode,
+                                                       zero_ti_pc_required=True))
+
+        cls.wind_speeds = np.append(np.linspace(-1.0, 35.0, 181), np.nan)
+        cls.turbulences = np.append(np.linspace(0.0, 0.3, 181), 0.1)
+        cls.normalised_wind_speeds = np.linspace(-0.5, 1.5, 182)
+
+    def test_power_array_matches_power(self):
+
+        for power_curve in self.power_curves:
+
+            expected = [power_curve.power(wind_speed) for wind_speed in self.wind_speeds]
+
+            np.testing.assert_allclose(power_curve.power_array(self.wind_speeds), expected, atol=1e-9)
+
+    def test_turbulence_power_array_matches_power(self):
+
+        for power_curve in self.power_curves:
+
+            for augment in [False, True]:
+
+                expected = [power_curve.power(self.wind_speeds[i],
+                                              self.turbulences[i],
+                                              augment,
+                                              self.normalised_wind_speeds[i])
+                            for i in range(len(self.wind_speeds))]
+
+                actual = power_curve.power_array(self.wind_speeds,
+                                                 self.turbulences,
+                                                 augment,
+                                                 self.normalised_wind_speeds)
+
+                np.testing.assert_allclose(actual, expected, atol=1e-9)
+
+
+class TestSimulatedPowerArrays(unittest.TestCase):
+
+    def setUp(self):
+
+        config = PowerCurveConfiguration(join(FILE_DIR, 'data', 'test_power_curve.xml'))
+
+        self.power_curve = turbine.PowerCurve(turbine.RotorGeometry(100.0, 100.0),
+                                              config.density,
+                                              config.data_frame,
+                                              config.speed_column,
+                                              config.turbulence_column,
+                                              config.power_column,
+                                              zero_ti_pc_required=True)
+
+        random = np.random.RandomState(0)
+
+        self.wind_speeds = np.append(random.uniform(0.0, 30.0, 500), [0.0, -1.0, 10.0, np.nan])
+        self.turbulences = np.append(random.uniform(0.0, 0.4, 500), [0.1, 0.1, 0.0, 0.1])
+
+        self.chunk_size = turbine.SimulatedPower.ChunkSize
+
+    def tearDown(self):
+        turbine.SimulatedPower.ChunkSize = self.chunk_size
+
+    def test_power_array_matches_power(self):
+
+        simulated_power = self.power_curve.simulatedPower
+
+        expected = [simulated_power.power(self.wind_speeds[i], self.turbulences[i])
+                    for i in range(len(self.wind_speeds))]
+
+        for chunk_size in [7, 10000]:
+            turbine.SimulatedPower.ChunkSize = chunk_size
+            actual = simulated_power.power_array(self.wind_speeds, self.turbulences)
+            np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9)
+
+
+class TestZeroTurbulencePowerCurve(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+
+        config = PowerCurveConfiguration(join(FILE_DIR, 'data', 'test_power_curve.xml'))
+
+        cls.power_curve = turbine.PowerCurve(turbine.RotorGeometry(100.0, 100.0),
+                                             config.density,
+                                             config.data_frame,
+                                             config.speed_column,
+                                             config.turbulence_column,
+                                             config.power_column,
+                                             zero_ti_pc_required=True)
+
+        cls.wind_speeds = np.linspace(-1.0, 40.0, 411)
+
+    def test_power_array_matches_power(self):
+
+        zero_turbulence_power_curve = self.power_curve.zeroTurbulencePowerCurve
+
+        curves = [zero_turbulence_power_curve, zero_turbulence_power_curve.initial_zero_turbulence_power_curve]
+
+        for curve in curves:
+
+            expected = [float(curve.power(wind_speed)) for wind_speed in self.wind_speeds]
+
+            np.testing.assert_allclose(curve.power_array(self.wind_speeds), expected, atol=1e-9)
+
+    def test_iteration_stats_match_scalar_calculation(self):
+
+        initial_curve = self.power_curve.zeroTurbulencePowerCurve.initial_zero_turbulence_power_curve
+        available_power = self.power_curve.available_power
+
+        wind_speeds = initial_curve.integration_range.wind_speeds
+        powers = initial_curve.power_array(wind_speeds)
+
+        stats = turbine.IterationPowerCurveStats(wind_speeds, powers, available_power)
+
+        self.assertEqual(stats.rated_power, max(powers))
+        self.assertEqual(stats.cp_max, max(available_power.power_coefficient(wind_speeds[i], powers[i])
+                                           for i in range(len(wind_speeds))))
+        self.assertEqual(stats.cut_in_wind_speed, min(wind_speeds[i] for i in range(len(wind_speeds))
+                                                      if powers[i] >= 0.001 * max(powers)))
+
+    def test_convergence_checks_recorded(self):
+
+        initial_curve = self.power_curve.zeroTurbulencePowerCurve.initial_zero_turbulence_power_curve
+
+        self.assertTrue(0 < len(initial_curve.convergence_checks) <= initial_curve.max_iterations)
+        self.assertTrue(initial_curve.convergence_checks[-1].isConverged)
+
+        for convergence_check in initial_curve.convergence_checks[:-1]:
+            self.assertFalse(convergence_check.isConverged)
+
+
+class TestZeroTurbulencePowerCurveCache(unittest.TestCase):
+
+    def setUp(self):
+
+        self.config = PowerCurveConfiguration(join(FILE_DIR, 'data', 'test_power_curve.xml'))
+
+        self.maximum_size = turbine.ZeroTurbulencePowerCurveCache.MaximumSize
+        self.enabled = turbine.ZeroTurbulencePowerCurveCache.Enabled
+
+        turbine.ZeroTurbulencePowerCurveCache.Enabled = True
+        turbine.ZeroTurbulencePowerCurveCache.clear()
+
+    def tearDown(self):
+
+        turbine.ZeroTurbulencePowerCurveCache.MaximumSize = self.maximum_size
+        turbine.ZeroTurbulencePowerCurveCache.Enabled = self.enabled
+        turbine.ZeroTurbulencePowerCurveCache.clear()
+
+    def power_curve(self, diameter=100.0, relaxation=turbine.NoRelaxation()):
+
+        return turbine.PowerCurve(turbine.RotorGeometry(diameter, 100.0),
+                                  self.config.density,
+                                  self.config.data_frame,
+                                  self.config.speed_column,
+                                  self.config.turbulence_column,
+                                  self.config.power_column,
+                                  zero_ti_pc_required=True,
+                                  relaxation=relaxation)
+
+    def test_identical_curves_share_solution(self):
+
+        first = self.power_curve()
+        second = self.power_curve()
+
+        self.assertIs(second.zeroTurbulencePowerCurve, first.zeroTurbulencePowerCurve)
+        self.assertIs(second.simulatedPower, first.simulatedPower)
+
+        self.assertIsNot(self.power_curve(diameter=90.0).zeroTurbulencePowerCurve, first.zeroTurbulencePowerCurve)
+
+    def test_relaxed_curve_matches_uncached_curve(self):
+
+        power_curve = self.power_curve()
+        power_curve.update_zero_ti(turbine.Relaxation(0.7))
+
+        relaxed = power_curve.zeroTurbulencePowerCurve
+
+        power_curve.revert_zero_ti()
+        power_curve.update_zero_ti(turbine.Relaxation(0.7))
+
+        self.assertIs(power_curve.zeroTurbulencePowerCurve, relaxed)
+
+        turbine.ZeroTurbulencePowerCurveCache.Enabled = False
+
+        uncached = self.power_curve(relaxation=turbine.Relaxation(0.7)).zeroTurbulencePowerCurve
+
+        self.assertIsNot(uncached, relaxed)
+        np.testing.assert_array_equal(uncached.powers, relaxed.powers)
+
+    def test_least_recently_used_entries_evicted(self):
+
+        turbine.ZeroTurbulencePowerCurveCache.MaximumSize = 2
+
+        first = self.power_curve(diameter=90.0)
+        self.power_curve(diameter=100.0)
+
+        self.assertIs(self.power_curve(diameter=90.0).zeroTurbulencePowerCurve, first.zeroTurbulencePowerCurve)
+
+        self.power_curve(diameter=110.0)
+
+        self.assertEqual(len(turbine.ZeroTurbulencePowerCurveCache.Entries), 2)
+        self.assertIs(self.power_curve(diameter=90.0).zeroTurbulencePowerCurve, first.zeroTurbulencePowerCurve)
+
+
+class TestSimulatedPowerLookup(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+
+        config = PowerCurveConfiguration(join(FILE_DIR, 'data', 'test_power_curve.xml'))
+
+        cls.power_curve = turbine.PowerCurve(turbine.RotorGeometry(100.0, 100.0),
+                                             config.density,
+                                             config.data_frame,
+                                             config.speed_column,
+                                             config.turbulence_column,
+                                             config.power_column,
+                                             zero_ti_pc_required=True)
+
+        cls.lookup = turbine.SimulatedPowerLookup(cls.power_curve.simulatedPower,
+                                                  maximum_wind_speed=30.0,
+                                                  maximum_turbulence=0.3)
+
+    def test_lookup_matches_integration(self):
+
+        random = np.random.RandomState(0)
+
+        wind_speeds = np.append(random.uniform(-1.0, 35.0, 2000), np.nan)
+        turbulences = np.append(random.uniform(0.0, 0.35, 2000), 0.1)
+
+        expected = self.power_curve.simulatedPower.power_array(wind_speeds, turbulences)
+        actual = self.lookup.power_array(wind_speeds, turbulences)
+
+        np.testing.assert_allclose(actual, expected, atol=2.0 * self.lookup.tolerance)
+
+    def test_lookup_dropped_with_zero_turbulence_curve(self):
+
+        self.power_curve.simulated_power_lookup = self.lookup
+
+        self.power_curve.update_zero_ti(turbine.Relaxation(0.5))
+        self.assertIsNone(self.power_curve.simulated_power_lookup)
+
+        self.power_curve.simulated_power_lookup = self.lookup
+
+        self.power_curve.revert_zero_ti()
+        self.assertIsNone(self.power_curve.simulated_power_lookup)